@@ -1,9 +1,23 @@
 import os
-import json
+from functools import cached_property
 from typing import Optional, List, Dict
-from pydantic import Field, AnyUrl, HttpUrl, field_validator
+import orjson
+from pydantic import Field, AnyUrl, HttpUrl, PrivateAttr, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Level keywords checked in order against a list name, with the template field each selects
+_LEVEL_RULES = (
+    (("junior", "intern", "entry"), "TEMPLATE_NAME_JUNIOR"),
+    (("senior",), "TEMPLATE_NAME_SENIOR"),
+    (("executive", "director"), "TEMPLATE_NAME_EXECUTIVE"),
+    (("mid", "associate"), "TEMPLATE_NAME_MID"),
+)
+
+# Fields that must be non-empty, and placeholder values copied from the example .env
+_REQUIRED = ("ENV", "PHONE_NUMBER_ID", "WHATSAPP_TOKEN", "BREVO_API_KEY", "TEMPLATE_NAME")
+_PLACEHOLDER_TOKEN = "input_your_token_here"
+_PLACEHOLDER_KEY = "xkeysib-your-dummy-key-here"
+
 class Settings(BaseSettings):
     """
     Application configuration loaded from environment variables.
@@ -29,6 +43,8 @@ class Settings(BaseSettings):
     BREVO_LIST_ID: Optional[int] = Field(None, description="Brevo List ID to filter contacts (deprecated - use EXPERIENCE_LIST_MAP)")
     BREVO_PHONE_ATTRIBUTE: str = Field("SMS", description="Attribute containing phone number")
     BREVO_OPT_OUT_ATTRIBUTE: str = Field("OPT_OUT", description="Attribute for opt-out status")
+    BREVO_PAGE_WINDOW: int = Field(4, description="Number of contact pages fetched concurrently from Brevo")
+    BREVO_INCREMENTAL_SYNC: bool = Field(False, description="Only fetch contacts modified since the last complete scan of a list/campaign")
 
     # Experience Targeting (Job Campaigns)
     EXPERIENCE_LIST_MAP: Optional[str] = Field(None, description='JSON mapping of experience levels to list IDs: {"junior":123, "mid":456, "senior":789}')
@@ -46,74 +62,98 @@ class Settings(BaseSettings):
     # Rate Limiting & Control
     DAILY_LIMIT: int = Field(100, description="Maximum number of messages to send per day")
     SEND_DELAY_SECONDS: float = Field(5.0, description="Minimum seconds to wait between calls")
+    BURST_CAPACITY: int = Field(1, description="Sends allowed back-to-back after an idle stretch")
+    SEND_CONCURRENCY: int = Field(1, description="Maximum WhatsApp API calls in flight at once")
     MAX_RETRIES: int = Field(2, description="Maximum retry attempts per message")
     RETRY_BACKOFF_SECONDS: float = Field(5.0, description="Base seconds for exponential backoff")
 
     # Logging
     LOG_LEVEL: str = Field("INFO", description="Logging level")
+    CONSOLE_LOG_LEVEL: str = Field("INFO", description="Minimum level echoed to the console (the log file follows LOG_LEVEL)")
     LOG_FILE: str = Field("logs/whatsapp_marketing.log", description="Path to application log file")
-    RESULT_LOG_FILE: str = Field("logs/send_results.jsonl", description="Path to JSONL result log")
+    RESULT_LOG_FILE: str = Field("logs/send_results.jsonl", description="Base path of the JSONL result log; records go to <stem>.YYYY-MM-DD<suffix> alongside it")
+
+    # Per-level template names resolved so far (level name -> template)
+    _template_cache: Dict[str, str] = PrivateAttr(default_factory=dict)
+    # Result of validate_required_fields(), computed on first call
+    _validation_result: Optional[tuple] = PrivateAttr(default=None)
 
     @property
     def api_base_url(self) -> str:
         return f"https://graph.facebook.com/{self.WA_API_VERSION}"
     
-    @property
+    @cached_property
     def is_test_env(self) -> bool:
         return self.ENV.lower() == "test"
     
-    @property
+    @cached_property
     def is_prod_env(self) -> bool:
         return self.ENV.lower() == "prod"
     
-    def get_experience_list_map(self) -> Dict[str, int]:
-        """Parse EXPERIENCE_LIST_MAP JSON and return as dict."""
+    @cached_property
+    def experience_list_map(self) -> Dict[str, int]:
+        """EXPERIENCE_LIST_MAP parsed once; the env value doesn't change for the process lifetime."""
         if not self.EXPERIENCE_LIST_MAP:
             return {}
         try:
-            mapping = json.loads(self.EXPERIENCE_LIST_MAP)
+            mapping = orjson.loads(self.EXPERIENCE_LIST_MAP)
             # Validate all values are integers
             return {k.lower(): int(v) for k, v in mapping.items()}
-        except (json.JSONDecodeError, ValueError, TypeError) as e:
+        except (orjson.JSONDecodeError, ValueError, TypeError) as e:
             raise ValueError(f"Invalid EXPERIENCE_LIST_MAP format: {e}. Expected JSON like {{'junior':123, 'mid':456, 'senior':789}}")
     
+    def get_experience_list_map(self) -> Dict[str, int]:
+        """Parse EXPERIENCE_LIST_MAP JSON and return as dict."""
+        return self.experience_list_map
+    
     def get_template_name_for_level(self, level: str) -> str:
         """Get the template name for a list by searching for level keywords in its name."""
         if not level:
             return self.TEMPLATE_NAME
             
         name = level.lower()
-        
-        if ("junior" in name or "intern" in name or "entry" in name) and self.TEMPLATE_NAME_JUNIOR:
-            return self.TEMPLATE_NAME_JUNIOR
-        elif ("senior" in name) and self.TEMPLATE_NAME_SENIOR:
-            return self.TEMPLATE_NAME_SENIOR
-        elif ("executive" in name or "director" in name) and self.TEMPLATE_NAME_EXECUTIVE:
-            return self.TEMPLATE_NAME_EXECUTIVE
-        elif ("mid" in name or "associate" in name) and self.TEMPLATE_NAME_MID:
-            return self.TEMPLATE_NAME_MID
+        template = self._template_cache.get(name)
+        if template is None:
+            template = self._template_cache[name] = self._resolve_template_name(name)
+        return template
+    
+    def _resolve_template_name(self, name: str) -> str:
+        """Match a lowercased list name against the level keywords."""
+        for keywords, template_attr in _LEVEL_RULES:
+            if any(k in name for k in keywords):
+                template = getattr(self, template_attr)
+                if template:
+                    return template
             
         return self.TEMPLATE_NAME
     
     def validate_required_fields(self) -> List[str]:
-        """Validate all required environment variables are set properly."""
+        """
+        Validate all required environment variables are set properly.
+        Settings don't change after startup, so the result is computed once.
+        """
+        if self._validation_result is None:
+            self._validation_result = tuple(self._check_required_fields())
+        return list(self._validation_result)
+    
+    def _check_required_fields(self) -> List[str]:
         missing = []
         
         # Check for default/placeholder values
-        if "input_your_token_here" in getattr(self, 'WHATSAPP_TOKEN', ''):
+        if _PLACEHOLDER_TOKEN in self.WHATSAPP_TOKEN:
             missing.append("WHATSAPP_TOKEN (contains placeholder)")
-        if "xkeysib-your-dummy-key-here" in getattr(self, 'BREVO_API_KEY', ''):
+        if _PLACEHOLDER_KEY in self.BREVO_API_KEY:
             missing.append("BREVO_API_KEY (contains placeholder)")
         
         # Check empty required fields
-        required_fields = ['ENV', 'PHONE_NUMBER_ID', 'WHATSAPP_TOKEN', 'BREVO_API_KEY', 'TEMPLATE_NAME']
-        for field in required_fields:
-            value = getattr(self, field, None)
+        values = self.__dict__
+        for field in _REQUIRED:
+            value = values.get(field)
             if not value or (isinstance(value, str) and not value.strip()):
                 missing.append(f"{field} (empty or missing)")
         
         # Check ENV value
-        if hasattr(self, 'ENV') and self.ENV.lower() not in ['test', 'prod']:
+        if self.ENV.lower() not in ['test', 'prod']:
             missing.append("ENV (must be 'test' or 'prod')")
         
         # Validate EXPERIENCE_LIST_MAP if provided
@@ -136,11 +176,12 @@ except Exception as e:
     # We'll allow import without valid settings for tests that mock them,
     # but actual usage will fail if env vars aren't set
     if os.environ.get("PYTEST_CURRENT_TEST"):
-        # Create a dummy instance just for import-time safety during tests
-        # The tests should mock the actual object
-        class DummySettings:
-            def __getattr__(self, name):
-                return None
-        settings = DummySettings()
+        # Unvalidated instance just for import-time safety during tests: fields keep
+        # their defaults (required ones are None) and the methods and properties
+        # stay available. The tests should mock the actual object
+        required = {name: None for name, field in Settings.model_fields.items() if field.is_required()}
+        settings = Settings.model_construct(**{**required, "ENV": "test"})
+        # Instance attribute, so it shadows the method (a model rejects unknown fields)
+        object.__setattr__(settings, "validate_required_fields", lambda: [])
     else:
         raise
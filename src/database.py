@@ -1,13 +1,66 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import sqlite3
+import orjson
 import os
-from typing import List, Dict, Any, Optional
+import re
+import logging
+import atexit
+import functools
+import queue
+import threading
+import time
+import types
+from collections import deque
+from itertools import islice
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Set, FrozenSet, Mapping, Sequence, Callable, Iterator
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from .config import settings
 from .logger import logger
 from .validators import validate_phone
 
+# Applied to every history connection. send_history is append-only operational
+# data, so WAL with synchronous=NORMAL (no fsync per commit) is an acceptable trade.
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64MB page cache
+    "PRAGMA mmap_size=268435456",  # 256MB memory-mapped reads
+)
+
+# Already-normalized numbers (what validate_phone would return unchanged) skip the full validator
+_FAST_PHONE = re.compile(r"[0-9]{10,15}").fullmatch
+
+# Hot-path statements kept as module constants so sqlite3's statement cache always hits
+_SQL_CHECK_SENT = (
+    "SELECT 1 FROM send_history "
+    "WHERE phone = ? AND campaign_key = ? AND status = 'success' LIMIT 1"
+)
+_SQL_INSERT_SEND = (
+    "INSERT OR REPLACE INTO send_history "
+    "(phone, campaign_key, experience_level, list_id, sent_at, status, wamid, error) "
+    "VALUES (?1, ?2, ?3, ?4, ?8, ?5, ?6, ?7)"  # ?8: sent_at, stamped once per batch
+)
+_SQL_SENT_FOR_CAMPAIGN = (
+    "SELECT phone FROM send_history WHERE campaign_key = ? AND status = 'success'"
+)
+_SQL_GET_CURSOR = "SELECT value FROM sync_cursor WHERE key = ?"
+_SQL_SET_CURSOR = (
+    "INSERT INTO sync_cursor (key, value) VALUES (?, ?) "
+    "ON CONFLICT(key) DO UPDATE SET value = excluded.value"
+)
+
+
+def _utc_now_sql() -> str:
+    """Current UTC time in SQLite's datetime('now') format."""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+
+
 class BrevoClient:
     """
     Client for interacting with Brevo (Sendinblue) API v3.
@@ -23,28 +76,106 @@ class BrevoClient:
             "content-type": "application/json"
         }
         
+        # One pooled session for all Brevo calls so TCP/TLS connections are reused
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # Enough pooled connections for every concurrent page fetch, with transient
+        # errors and rate limiting retried (with backoff) below the application
+        pool_size = max(10, settings.BREVO_PAGE_WINDOW)
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=3, backoff_factor=0.3,
+                              status_forcelist=(429, 500, 502, 503, 504),
+                              allowed_methods=frozenset({"GET"}),
+                              raise_on_status=False),
+        ))
+        
         # SQLite for send history tracking
         self.db_path = "send_history.db"
         self.conn = None
-        self.cursor = None
+        # The connection is shared with the prefetch thread; each call takes its own
+        # cursor under this lock, so one thread's query never resets another's results
+        self._conn_lock = threading.Lock()
         self._init_sqlite()
         
+        # Worker pool for concurrent contact page fetches (created on first use)
+        self._executor = None
+        
+        # Folder/list lookups barely change during a run; keep them for folder_cache_ttl
+        # seconds, then serve them (while refreshing in the background) for up to
+        # folder_cache_stale_ttl seconds before a caller has to wait on Brevo again
+        self.folder_cache_ttl = 300
+        self.folder_cache_stale_ttl = 1800
+        self._folder_cache: Dict[tuple, tuple] = {}
+        self._folder_cache_lock = threading.Lock()
+        self._folder_refreshing: Set[tuple] = set()
+        
+        # Buffered send history is written by a background thread on its own
+        # connection, in transactions of up to flush_every rows; it waits up to
+        # flush_interval seconds for a batch to fill before committing
+        self._write_queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=10000)
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self.flush_every = 256
+        self.flush_interval = 0.2
+        
+        # Sync positions of incremental scans that ran to the end, held until the
+        # caller confirms every recipient was handled (see commit_scan_cursor)
+        self._completed_scans: Dict[str, str] = {}
+        
     def _init_sqlite(self):
         """Initialize SQLite connection for send history tracking."""
         try:
-            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.cursor = self.conn.cursor()
-            logger.debug(f"SQLite connection established: {self.db_path}")
+            # Autocommit mode; writes open their own transactions via _transaction()
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None,
+                                        cached_statements=256)
+            for pragma in _SQLITE_PRAGMAS:
+                self.conn.execute(pragma)
+            logger.debug("SQLite connection established: %s", self.db_path)
         except Exception as e:
             print(f"Failed to initialize SQLite: {e}")  # Use print instead of logger to avoid recursion
             self.conn = None
-            self.cursor = None
+        
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed writes in a single IMMEDIATE transaction (one commit for the block)."""
+        with self._conn_lock:
+            cursor = self.conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except Exception:
+                self.conn.rollback()
+                raise
+            else:
+                self.conn.commit()
+        
+    def close(self):
+        """Flush buffered history and release HTTP, thread pool and SQLite resources."""
+        self.flush_sends()
+        if self._writer is not None:
+            self._write_queue.put(None)
+            self._writer.join()
+            self._writer = None
+        self.session.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self.conn:
+            with self._conn_lock:
+                try:
+                    self.conn.execute("PRAGMA optimize")  # refreshes stale planner stats, usually a no-op
+                except sqlite3.Error:
+                    pass
+                self.conn.close()
+                self.conn = None
         
     def verify_connection(self) -> bool:
         """Test API connection by fetching account info."""
         try:
             url = f"{self.base_url}/account"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, timeout=10)
             if response.status_code == 200:
                 return True
             logger.error(f"Brevo connection failed. Status: {response.status_code}, Body: {response.text}")
@@ -69,182 +200,345 @@ class BrevoClient:
             List of dictionaries containing user details normalized to our app structure:
             {'id': str, 'phone': str, 'experience_level': str, 'list_id': int, 'last_sent_at': None}
         """
+        return list(self.iter_eligible_recipients(limit=limit, list_id=list_id,
+                                                  campaign_key=campaign_key, experience_level=experience_level))
+
+    def iter_eligible_recipients(self, limit: Optional[int] = None, list_id: int = None,
+                                 campaign_key: str = None, experience_level: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Same as get_eligible_recipients, but yields recipients as pages arrive
+        so the caller can start sending before the scan (or the list) is done.
+        Pages are only fetched as the caller consumes; with no limit the scan
+        runs until Brevo is exhausted (or the page safety limit).
+        """
         url = f"{self.base_url}/contacts"
         
         # Use campaign_key for deduplication, fallback to template_name for backwards compatibility
         dedup_key = campaign_key if campaign_key else settings.TEMPLATE_NAME
         
-        normalized_contacts = []
+        found = 0
         offset = 0
         page_limit = 100  # Brevo's max per page
         max_pages = 50  # Safety limit to prevent infinite loops
         pages_fetched = 0
+        pages_requested = 0
         
-        # Keep fetching pages until we have enough eligible contacts or exhaust all contacts
-        while len(normalized_contacts) < limit and pages_fetched < max_pages:
-            params = {
-                "limit": page_limit,
-                "offset": offset,
-                "sort": "desc"
-            }
-            
-            # Prioritize list_id parameter (for job campaigns), fallback to global BREVO_LIST_ID
-            target_list_id = list_id if list_id is not None else settings.BREVO_LIST_ID
-            if target_list_id:
-                params["listIds"] = [target_list_id]
+        params = {
+            "limit": page_limit,
+            "sort": "desc"
+        }
+        
+        # Prioritize list_id parameter (for job campaigns), fallback to global BREVO_LIST_ID
+        target_list_id = list_id if list_id is not None else settings.BREVO_LIST_ID
+        if target_list_id:
+            params["listIds"] = [target_list_id]
+        
+        # Incremental mode: after a complete scan, later runs only ask Brevo for
+        # contacts modified since the newest one seen. Keyed per campaign and list,
+        # so a new campaign (or list) always starts with a full scan.
+        cursor_key = None
+        newest_modified = ""
+        if settings.BREVO_INCREMENTAL_SYNC:
+            cursor_key = self._scan_cursor_key(dedup_key, target_list_id)
+            self._completed_scans.pop(cursor_key, None)
+            last_modified = self.get_sync_cursor(cursor_key)
+            if last_modified:
+                params["modifiedSince"] = last_modified
+        
+        # Read settings once; they are invariant for the whole scan
+        opt_out_attr = settings.BREVO_OPT_OUT_ATTRIBUTE
+        phone_attr = settings.BREVO_PHONE_ATTRIBUTE
+        page_window = max(1, settings.BREVO_PAGE_WINDOW)
+        fast_phone = _FAST_PHONE
+        validate = validate_phone
+        logger_debug = logger.debug
+        # Skip building per-contact debug messages entirely unless DEBUG is on
+        debug_on = logger.isEnabledFor(logging.DEBUG)
+        
+        # Every phone already sent this campaign, loaded once from idx_success
+        sent = self._load_sent_set(dedup_key)
+        
+        def eligible(contacts):
+            """Yield (contact_id, clean_phone) for each contact on a page that passes every check."""
+            for contact in contacts:
+                cget = contact.get
+                contact_id = cget('id')
+                attributes = cget('attributes', {}) or {}
+                aget = attributes.get
+                
+                # CRITICAL: Check list membership (consent gate for this project)
+                if target_list_id:
+                    list_ids = cget('listIds', [])
+                    if target_list_id not in list_ids:
+                        if debug_on:
+                            logger_debug("Skipping contact %s: Not in target list %s", contact_id, target_list_id)
+                        continue
+                
+                # Check Opt-Out and Blacklisting
+                is_blacklisted = cget('emailBlacklisted', False) or cget('smsBlacklisted', False)
+                
+                if is_blacklisted:
+                    if debug_on:
+                        logger_debug("Skipping contact %s: Blacklisted", contact_id)
+                    continue
+                    
+                custom_opt_out = aget(opt_out_attr, False)
+                if custom_opt_out:
+                    if debug_on:
+                        logger_debug("Skipping contact %s: Custom opt-out", contact_id)
+                    continue
 
-            try:
-                response = requests.get(url, headers=self.headers, params=params, timeout=30)
-                response.raise_for_status()
+                # Get Phone, falling back to the other fields in order
+                phone = aget(phone_attr) or aget('WHATSAPP') or cget('mobile') or cget('sms')
+                
+                if not phone:
+                    if debug_on:
+                        logger_debug("Skipping contact %s: No phone number found in %s", contact_id, phone_attr)
+                    continue
+
+                # Normalize and validate phone
+                phone = str(phone)
+                try:
+                    clean_phone = phone if fast_phone(phone) else validate(phone)
+                except ValueError as e:
+                    if debug_on:
+                        logger_debug("Skipping contact %s: Invalid phone %s - %s", contact_id, phone, e)
+                    continue
+                
+                # Skip if already sent this campaign successfully
+                if clean_phone in sent:
+                    if debug_on:
+                        logger_debug("Skipping contact %s: Already sent campaign '%s'", contact_id, dedup_key)
+                    continue
+                
+                yield contact_id, clean_phone
+        
+        # The first page is fetched alone since most lists fit in a single page;
+        # once we know more are needed, up to page_window pages are kept in flight.
+        window = 1
+        exhausted = False
+        pending = deque()  # (offset, future) for pages requested but not yet processed
+        
+        try:
+            # Keep fetching pages until we have enough eligible contacts or exhaust all contacts
+            while (limit is None or found < limit) and not exhausted:
+                # Top the window back up as pages are consumed, so up to page_window
+                # requests stay in flight instead of waiting for a whole batch to land
+                while len(pending) < window and pages_requested < max_pages:
+                    pending.append((offset, self._fetch_contact_page(url, params, offset, inline=window == 1)))
+                    offset += page_limit
+                    pages_requested += 1
+                if not pending:
+                    break
+                window = page_window
                 
-                data = response.json()
-                contacts = data.get('contacts', [])
+                page_offset, page = pending.popleft()
+                try:
+                    contacts = page.result()
+                except Exception as e:
+                    logger.error(f"Failed to fetch contacts from Brevo (page {pages_fetched + 1}): {e}")
+                    raise
                 
                 # If no more contacts, break
                 if not contacts:
                     logger.info(f"No more contacts found after {pages_fetched} pages")
+                    exhausted = True
                     break
                     
-                logger.debug(f"Processing page {pages_fetched + 1}: {len(contacts)} contacts (offset: {offset})")
+                if debug_on:
+                    logger_debug("Processing page %d: %d contacts (offset: %d)", pages_fetched + 1, len(contacts), page_offset)
                 
-                for contact in contacts:
-                    contact_id = contact.get('id')
-                    attributes = contact.get('attributes', {})
-                    
-                    # CRITICAL: Check list membership (consent gate for this project)
-                    if target_list_id:
-                        list_ids = contact.get('listIds', [])
-                        if target_list_id not in list_ids:
-                            logger.debug(f"Skipping contact {contact_id}: Not in target list {target_list_id}")
-                            continue
-                    
-                    # Check Opt-Out and Blacklisting
-                    is_blacklisted = contact.get('emailBlacklisted', False) or contact.get('smsBlacklisted', False)
-                    
-                    if is_blacklisted:
-                        logger.debug(f"Skipping contact {contact_id}: Blacklisted")
-                        continue
-                        
-                    custom_opt_out = attributes.get(settings.BREVO_OPT_OUT_ATTRIBUTE, False)
-                    if custom_opt_out:
-                        logger.debug(f"Skipping contact {contact_id}: Custom opt-out")
-                        continue
-
-                    # Get Phone
-                    phone = attributes.get(settings.BREVO_PHONE_ATTRIBUTE)
-                    
-                    if not phone:
-                        # Try fallback fields
-                        phone = attributes.get('WHATSAPP') or contact.get('mobile') or contact.get('sms')
-                    
-                    if not phone:
-                        logger.debug(f"Skipping contact {contact_id}: No phone number found in {settings.BREVO_PHONE_ATTRIBUTE}")
-                        continue
-
-                    # Normalize and validate phone
-                    try:
-                        clean_phone = validate_phone(str(phone))
-                    except ValueError as e:
-                        logger.debug(f"Skipping contact {contact_id}: Invalid phone {phone} - {e}")
-                        continue
-                    
-                    # Skip if already sent this campaign successfully
-                    if self.was_sent_before(clean_phone, dedup_key):
-                        logger.debug(f"Skipping contact {contact_id}: Already sent campaign '{dedup_key}'")
-                        continue
-
-                    normalized_contacts.append({
+                if cursor_key:
+                    newest_modified = max(newest_modified, max(c.get('modifiedAt') or "" for c in contacts))
+                
+                # Consumed lazily, so contacts past the limit are never validated
+                for contact_id, clean_phone in islice(eligible(contacts), None if limit is None else limit - found):
+                    found += 1
+                    yield {
                         'id': str(contact_id),
                         'phone': clean_phone,
                         'experience_level': experience_level,
                         'list_id': target_list_id,
                         'last_sent_at': None
-                    })
-                    
-                    # Stop when we have enough eligible contacts
-                    if len(normalized_contacts) >= limit:
-                        break
+                    }
                 
-                # Move to next page
-                offset += page_limit
                 pages_fetched += 1
                 
+                if limit is not None and found >= limit:
+                    break
+                
                 # If we got fewer contacts than page_limit, we've reached the end
                 if len(contacts) < page_limit:
                     logger.info(f"Reached end of contacts after {pages_fetched} pages")
+                    exhausted = True
                     break
-                    
+            
+            # Only a scan that saw every contact in the delta may move the cursor,
+            # and only once the caller has handled them all; stopping early at the
+            # limit leaves older unsent contacts in the window.
+            if cursor_key and exhausted and newest_modified:
+                self._completed_scans[cursor_key] = newest_modified
+        finally:
+            # Pages requested ahead but not needed any more (also when the caller stops early)
+            for _, page in pending:
+                page.cancel()
+            
+            logger.info(f"Found {found} eligible recipients after checking {pages_fetched} pages")
+
+    def _fetch_contacts_page(self, url: str, params: Dict[str, Any], offset: int) -> List[Dict[str, Any]]:
+        """Fetch a single page of contacts from Brevo."""
+        response = self.session.get(url, params={**params, "offset": offset}, timeout=30)
+        response.raise_for_status()
+        return orjson.loads(response.content).get('contacts', [])
+
+    def _fetch_contact_page(self, url: str, params: Dict[str, Any], offset: int, inline: bool = False) -> Future:
+        """
+        Request one contact page and return a future for its contacts.
+        inline fetches on the calling thread (used for the first page); otherwise
+        the request goes to a shared thread pool so several round-trips overlap.
+        """
+        if inline:
+            page = Future()
+            try:
+                page.set_result(self._fetch_contacts_page(url, params, offset))
             except Exception as e:
-                logger.error(f"Failed to fetch contacts from Brevo (page {pages_fetched + 1}): {e}")
-                raise
+                page.set_exception(e)
+            return page
         
-        logger.info(f"Found {len(normalized_contacts)} eligible recipients after checking {pages_fetched} pages")
-        return normalized_contacts[:limit]  # Ensure we don't exceed requested limit
+        return self._pool().submit(self._fetch_contacts_page, url, params, offset)
+    
+    def _pool(self) -> ThreadPoolExecutor:
+        """Shared thread pool for overlapping Brevo requests, created on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=max(1, settings.BREVO_PAGE_WINDOW),
+                                                thread_name_prefix="brevo-pages")
+        return self._executor
 
-    def get_all_folders(self) -> List[Dict[str, Any]]:
+    def _cached(self, key: tuple, load: Callable[[], Any]) -> Any:
         """
-        Fetch all contact folders from Brevo.
+        Return the cached value for key, calling load() when it is missing or expired.
+        A stale value (past the TTL, within the stale TTL) is returned as is while one
+        background thread reloads it. Empty results (what the loaders return on
+        errors) are not cached.
         """
+        now = time.monotonic()
+        with self._folder_cache_lock:
+            hit = self._folder_cache.get(key)
+            if hit and hit[0] > now:
+                return hit[2]
+            if hit and hit[1] > now:
+                if key not in self._folder_refreshing:
+                    self._folder_refreshing.add(key)
+                    threading.Thread(target=self._refresh_cached, args=(key, load),
+                                     name="brevo-cache-refresh", daemon=True).start()
+                return hit[2]
+        
+        return self._store_cached(key, load())
+    
+    def _store_cached(self, key: tuple, value: Any) -> Any:
+        if value:
+            now = time.monotonic()
+            with self._folder_cache_lock:
+                self._folder_cache[key] = (now + self.folder_cache_ttl,
+                                           now + self.folder_cache_stale_ttl, value)
+        return value
+    
+    def _refresh_cached(self, key: tuple, load: Callable[[], Any]):
+        try:
+            self._store_cached(key, load())
+        except Exception as e:
+            logger.warning(f"Background refresh of {key[0]} failed: {e}")
+        finally:
+            with self._folder_cache_lock:
+                self._folder_refreshing.discard(key)
+    
+    def invalidate_folder_cache(self):
+        """Drop cached folder and list lookups (e.g. after changing folders in Brevo)."""
+        with self._folder_cache_lock:
+            self._folder_cache.clear()
+
+    def get_all_folders(self) -> Sequence[Dict[str, Any]]:
+        """
+        Fetch all contact folders from Brevo (cached, returned as a tuple).
+        """
+        return self._cached(("folders",), lambda: tuple(self._fetch_all_folders()))
+
+    def _folder_index(self) -> tuple:
+        """
+        (folders, by_id, by_upper_name) for every contact folder in Brevo.
+        Shared by get_all_folders and get_lists_by_folder_name and cached like
+        them, so the folder pagination runs once per TTL. Raises on HTTP errors.
+        """
+        return self._cached(("folder_index",), self._load_folder_index) or ((), {}, {})
+
+    def _load_folder_index(self) -> tuple:
         folders = []
         offset = 0
         limit = 50
-        try:
-            while True:
-                url = f"{self.base_url}/contacts/folders?limit={limit}&offset={offset}"
-                response = requests.get(url, headers=self.headers, timeout=10)
-                response.raise_for_status()
-                batch = response.json().get('folders', [])
-                
-                # Fetch list count for each folder
-                for folder in batch:
-                    folder_id = folder['id']
-                    # Use a lightweight check or the lists endpoint
-                    list_url = f"{self.base_url}/contacts/folders/{folder_id}/lists?limit=1"
-                    try:
-                        list_res = requests.get(list_url, headers=self.headers, timeout=5)
-                        folder['list_count'] = list_res.json().get('count', 0)
-                    except:
-                        folder['list_count'] = 0
+        while True:
+            url = f"{self.base_url}/contacts/folders?limit={limit}&offset={offset}"
+            response = self.session.get(url, timeout=10)
+            response.raise_for_status()
+            batch = response.json().get('folders', [])
+            folders.extend(batch)
+            if len(batch) < limit:
+                break
+            offset += limit
+        
+        if not folders:
+            return ()
+        # Reversed so the first folder wins for duplicate names, as a linear scan would
+        by_name = {f['name'].upper(): f for f in reversed(folders)}
+        return tuple(folders), {f['id']: f for f in folders}, by_name
 
-                folders.extend(batch)
-                if len(batch) < limit:
-                    break
-                offset += limit
+    def _fetch_all_folders(self) -> List[Dict[str, Any]]:
+        """Every contact folder, with each one's list_count attached."""
+        try:
+            # Copies, so the shared folder index is never mutated
+            folders = [dict(f) for f in self._folder_index()[0]]
+            
+            # Fetch list count for each folder; the probes are independent, so
+            # they run concurrently on the shared pool (bounded by its size)
+            counts = self._pool().map(self._fetch_list_count, [f['id'] for f in folders])
+            for folder, count in zip(folders, counts):
+                folder['list_count'] = count
             return folders
         except Exception as e:
             logger.error(f"Error fetching folders from Brevo: {e}")
             return []
 
-    def get_lists_by_folder_name(self, folder_identifier: str) -> Dict[str, int]:
+    def _fetch_list_count(self, folder_id: int) -> int:
+        """Number of lists in a folder, via a lightweight limit=1 request (0 on error)."""
+        list_url = f"{self.base_url}/contacts/folders/{folder_id}/lists?limit=1"
+        try:
+            list_res = self.session.get(list_url, timeout=5)
+            return list_res.json().get('count', 0)
+        except Exception:
+            return 0
+
+    def get_lists_by_folder_name(self, folder_identifier: str) -> Mapping[str, int]:
         """
-        Find a folder by name or ID and return its list mapping.
+        Find a folder by name or ID and return its list mapping (cached, read-only).
         """
+        return self._cached(("lists", folder_identifier),
+                            lambda: types.MappingProxyType(self._fetch_lists_by_folder_name(folder_identifier)))
+
+    def _fetch_lists_by_folder_name(self, folder_identifier: str) -> Dict[str, int]:
+        """Resolve the folder and page through its lists ({} if not found or on error)."""
         try:
-            # 1. Get all folders using pagination
-            folders = []
-            offset = 0
-            limit = 50
-            while True:
-                folders_url = f"{self.base_url}/contacts/folders?limit={limit}&offset={offset}"
-                response = requests.get(folders_url, headers=self.headers, timeout=10)
-                response.raise_for_status()
-                batch = response.json().get('folders', [])
-                folders.extend(batch)
-                if len(batch) < limit:
-                    break
-                offset += limit
+            # 1. Get all folders (shared, cached index)
+            _, folders_by_id, folders_by_name = self._folder_index()
             
             # 2. Find target folder (by ID or Name)
             target_folder = None
             
             # Check if identifier is string and numeric (Folder ID)
             if isinstance(folder_identifier, str) and folder_identifier.isdigit():
-                target_id = int(folder_identifier)
-                target_folder = next((f for f in folders if f['id'] == target_id), None)
+                target_folder = folders_by_id.get(int(folder_identifier))
             
             # Fallback/alternative: Check by Name
             if not target_folder:
-                target_folder = next((f for f in folders if f['name'].upper() == folder_identifier.upper()), None)
+                target_folder = folders_by_name.get(folder_identifier.upper())
             
             if not target_folder:
                 logger.error(f"Folder identifier '{folder_identifier}' not found in Brevo.")
@@ -258,7 +552,7 @@ class BrevoClient:
             try:
                 while True:
                     lists_url = f"{self.base_url}/contacts/folders/{folder_id}/lists?limit={limit}&offset={offset}"
-                    response = requests.get(lists_url, headers=self.headers, timeout=10)
+                    response = self.session.get(lists_url, timeout=10)
                     response.raise_for_status()
                     batch = response.json().get('lists', [])
                     folder_lists.extend(batch)
@@ -272,7 +566,7 @@ class BrevoClient:
                 offset = 0
                 while True:
                     url = f"{self.base_url}/contacts/lists?limit={limit}&offset={offset}"
-                    res = requests.get(url, headers=self.headers, timeout=15)
+                    res = self.session.get(url, timeout=15)
                     res.raise_for_status()
                     batch = res.json().get('lists', [])
                     all_lists.extend(batch)
@@ -297,72 +591,235 @@ class BrevoClient:
             return
             
         try:
-            # Create send_history table with campaign_key for job campaigns
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS send_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    phone TEXT NOT NULL,
-                    campaign_key TEXT NOT NULL,
-                    experience_level TEXT,
-                    list_id INTEGER,
-                    sent_at DATETIME NOT NULL,
-                    status TEXT NOT NULL,
-                    wamid TEXT,
-                    error TEXT,
-                    UNIQUE(phone, campaign_key) ON CONFLICT REPLACE
-                )
-            ''')
+            with self._transaction() as cursor:
+                # Create send_history table with campaign_key for job campaigns
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS send_history (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        phone TEXT NOT NULL,
+                        campaign_key TEXT NOT NULL,
+                        experience_level TEXT,
+                        list_id INTEGER,
+                        sent_at DATETIME NOT NULL,
+                        status TEXT NOT NULL,
+                        wamid TEXT,
+                        error TEXT,
+                        UNIQUE(phone, campaign_key) ON CONFLICT REPLACE
+                    )
+                ''')
             
-            # Create index for fast lookups
-            self.cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_phone_campaign 
-                ON send_history(phone, campaign_key, status)
-            ''')
+                # Partial index over successful sends only; covers the dedup lookups
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_success 
+                    ON send_history(campaign_key, phone) WHERE status = 'success'
+                ''')
+                
+                # Lets the dashboard's recent-activity summary scan only the last day
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_sent_at_status
+                    ON send_history(sent_at, status)
+                ''')
+                
+                # Superseded by idx_success
+                cursor.execute("DROP INDEX IF EXISTS idx_phone_campaign")
+                
+                # Incremental Brevo scan positions (see BREVO_INCREMENTAL_SYNC)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS sync_cursor (
+                        key TEXT PRIMARY KEY,
+                        value TEXT
+                    )
+                ''')
             
-            self.conn.commit()
+            self._analyze_if_needed()
             logger.debug("Send history tables created/verified")
             
         except Exception as e:
             logger.error(f"Failed to create SQLite tables: {e}")
     
+    def _analyze_if_needed(self):
+        """
+        Gather planner statistics once the history is big enough to matter, so
+        campaign lookups keep choosing idx_success; later runs leave it to PRAGMA optimize.
+        """
+        with self._conn_lock:
+            has_stats = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+            if has_stats and self.conn.execute(
+                    "SELECT 1 FROM sqlite_stat1 WHERE tbl = 'send_history'").fetchone():
+                return
+            count = self.conn.execute("SELECT COUNT(*) FROM send_history").fetchone()[0]
+            if count > 1000:
+                self.conn.execute("ANALYZE send_history")
+    
     def was_sent_before(self, phone: str, campaign_key: str) -> bool:
         """Check if phone was already successfully sent this campaign."""
-        if not self.cursor:
+        if not self.conn:
             return False
             
         try:
-            self.cursor.execute('''
-                SELECT 1 FROM send_history 
-                WHERE phone = ? AND campaign_key = ? AND status = 'success'
-                LIMIT 1
-            ''', (phone, campaign_key))
+            with self._conn_lock:
+                row = self.conn.execute(_SQL_CHECK_SENT, (phone, campaign_key)).fetchone()
             
-            return self.cursor.fetchone() is not None
+            return row is not None
             
         except Exception as e:
             logger.error(f"Error checking send history: {e}")
             return False
     
+    def _load_sent_set(self, campaign_key: str) -> FrozenSet[str]:
+        """Return every phone already successfully sent this campaign (one index range scan)."""
+        if not self.conn:
+            return frozenset()
+        
+        try:
+            with self._conn_lock:
+                rows = self.conn.execute(_SQL_SENT_FOR_CAMPAIGN, (campaign_key,)).fetchall()
+            return frozenset(row[0] for row in rows)
+        except Exception as e:
+            logger.error(f"Error loading send history: {e}")
+            return frozenset()
+    
     def record_send(self, phone: str, campaign_key: str, status: str, 
                    experience_level: str = None, list_id: int = None,
                    wamid: str = None, error: str = None):
         """Record send attempt in persistent history with campaign tracking."""
-        if not self.cursor:
+        self.record_sends([(phone, campaign_key, experience_level, list_id, status, wamid, error)])
+    
+    def record_sends(self, rows: List[tuple]):
+        """
+        Record several send attempts in a single transaction.
+        
+        Args:
+            rows: Tuples of (phone, campaign_key, experience_level, list_id, status, wamid, error)
+        """
+        if not rows:
+            return
+        if not self.conn:
             logger.warning("SQLite not available. Cannot record send.")
             return
             
+        sent_at = _utc_now_sql()
         try:
-            self.cursor.execute('''
-                INSERT OR REPLACE INTO send_history 
-                (phone, campaign_key, experience_level, list_id, sent_at, status, wamid, error)
-                VALUES (?, ?, ?, ?, datetime('now'), ?, ?, ?)
-            ''', (phone, campaign_key, experience_level, list_id, status, wamid, error))
+            with self._transaction() as cursor:
+                cursor.executemany(_SQL_INSERT_SEND, [row + (sent_at,) for row in rows])
             
-            self.conn.commit()
-            logger.debug(f"Recorded {status} send to {phone} for campaign {campaign_key}")
+            logger.debug("Recorded %d send(s) in send history", len(rows))
             
         except Exception as e:
             logger.error(f"Failed to record send: {e}")
+    
+    def buffer_send(self, phone: str, campaign_key: str, status: str, 
+                    experience_level: str = None, list_id: int = None,
+                    wamid: str = None, error: str = None):
+        """
+        Queue a send attempt for the background history writer and return at once.
+        Rows are visible to history queries once written; call flush_sends() to wait.
+        """
+        if self._writer is None:
+            self._start_writer()
+        self._write_queue.put((phone, campaign_key, experience_level, list_id, status, wamid, error))
+    
+    def flush_sends(self):
+        """Block until every queued send attempt is written (also runs at interpreter exit)."""
+        if self._writer is not None:
+            self._write_queue.join()
+    
+    def _start_writer(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="send-history-writer",
+                                                daemon=True)
+                self._writer.start()
+    
+    def _writer_loop(self):
+        """Drain the write queue into batched transactions until a None sentinel arrives."""
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            for pragma in _SQLITE_PRAGMAS:
+                conn.execute(pragma)
+        except Exception as e:
+            logger.error(f"Send history writer could not open SQLite: {e}")
+        
+        q = self._write_queue
+        running = True
+        while running:
+            batch = [q.get()]
+            # Give a burst of sends a moment to fill the batch before committing
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_every:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(q.get(timeout=remaining) if remaining > 0 else q.get_nowait())
+                except queue.Empty:
+                    break
+            
+            rows = [row for row in batch if row is not None]
+            running = len(rows) == len(batch)
+            if rows and conn is not None:
+                try:
+                    # One clock read per batch; the batch spans at most flush_interval
+                    sent_at = _utc_now_sql()
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.executemany(_SQL_INSERT_SEND, [row + (sent_at,) for row in rows])
+                    conn.commit()
+                    logger.debug("Recorded %d send(s) in send history", len(rows))
+                except Exception as e:
+                    conn.rollback()
+                    logger.error(f"Failed to record sends: {e}")
+            for _ in batch:
+                q.task_done()
+        
+        if conn is not None:
+            conn.close()
+
+    @staticmethod
+    def _scan_cursor_key(dedup_key: str, target_list_id: Optional[int]) -> str:
+        return f"contacts:{dedup_key}:{target_list_id or ''}"
+    
+    def commit_scan_cursor(self, list_id: int = None, campaign_key: str = None):
+        """
+        Advance the incremental sync cursor past the last complete scan of this
+        list and campaign (same arguments as iter_eligible_recipients).
+        
+        Call it only once every recipient that scan yielded was sent or recorded;
+        until then, the next run scans the same window again. A no-op when the
+        scan did not run to the end or incremental sync is off.
+        """
+        dedup_key = campaign_key if campaign_key else settings.TEMPLATE_NAME
+        target_list_id = list_id if list_id is not None else settings.BREVO_LIST_ID
+        cursor_key = self._scan_cursor_key(dedup_key, target_list_id)
+        newest_modified = self._completed_scans.pop(cursor_key, None)
+        if newest_modified:
+            self.set_sync_cursor(cursor_key, newest_modified)
+    
+    def get_sync_cursor(self, key: str) -> Optional[str]:
+        """Return the stored sync position for key, or None if there is none yet."""
+        if not self.conn:
+            return None
+        try:
+            with self._conn_lock:
+                row = self.conn.execute(_SQL_GET_CURSOR, (key,)).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            logger.error(f"Error reading sync cursor: {e}")
+            return None
+    
+    def set_sync_cursor(self, key: str, value: str):
+        """Store the sync position for key."""
+        if not self.conn:
+            return
+        try:
+            with self._transaction() as cursor:
+                cursor.execute(_SQL_SET_CURSOR, (key, value))
+        except Exception as e:
+            logger.error(f"Failed to save sync cursor: {e}")
 
-# Global database instance
-db = BrevoClient()
+@functools.cache
+def get_db() -> BrevoClient:
+    """Return the shared BrevoClient, creating it (and opening SQLite) on first call."""
+    db = BrevoClient()
+    # Only the shared client is closed at exit; other instances are closed by their owner
+    atexit.register(db.close)
+    return db
@@ -1,11 +1,53 @@
 import logging
 import sys
-import json
 import os
-from logging.handlers import RotatingFileHandler
+import atexit
+import threading
+import time
+import orjson
+import queue
+import re
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 from .config import settings
+from .validators import mask_phone
+
+# Date part of the leading "timestamp" field of a result record
+_RECORD_DATE = re.compile(rb'"timestamp": ?"(\d{4}-\d{2}-\d{2})').search
+
+def _seek_to_day(f, day: bytes):
+    """
+    Position f at (or shortly before) the first record dated `day`.
+    The result log is append-only, so record dates never decrease; bisecting on
+    byte offsets finds today's rows without reading the history before them.
+    """
+    lo, hi = 0, f.seek(0, os.SEEK_END)
+    while hi - lo > 64 * 1024:
+        mid = (lo + hi) // 2
+        f.seek(mid)
+        f.readline()  # skip the partial line we landed in
+        match = _RECORD_DATE(f.readline()[:40])
+        if match and match.group(1) < day:
+            lo = mid
+        else:
+            hi = mid
+    f.seek(lo)
+    if lo:
+        f.readline()
+
+# Background thread that writes log records to the file handler
+_listener: Optional[QueueListener] = None
+
+def _stop_listener():
+    """Drain queued records to the log file and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(_stop_listener)
 
 def setup_logging():
     """
@@ -15,9 +57,6 @@ def setup_logging():
     # Create logs directory if it doesn't exist
     log_file = Path(settings.LOG_FILE)
     log_file.parent.mkdir(parents=True, exist_ok=True)
-    
-    result_file = Path(settings.RESULT_LOG_FILE)
-    result_file.parent.mkdir(parents=True, exist_ok=True)
 
     # Configure root logger
     logger = logging.getLogger("whatsapp_cli")
@@ -28,6 +67,7 @@ def setup_logging():
 
     # Console Handler
     console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(getattr(logging, settings.CONSOLE_LOG_LEVEL.upper()))
     console_handler.setFormatter(logging.Formatter(
         '%(asctime)s - %(levelname)s - %(message)s',
         datefmt='%H:%M:%S'
@@ -38,23 +78,48 @@ def setup_logging():
     file_handler = RotatingFileHandler(
         settings.LOG_FILE,
         maxBytes=10*1024*1024,  # 10MB
-        backupCount=5
+        backupCount=5,
+        delay=True  # don't create/open the file until something is logged
     )
     file_handler.setFormatter(logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     ))
-    logger.addHandler(file_handler)
+    
+    # File writes (and rotation) happen on a listener thread, so callers only
+    # pay for a queue put. The console stays synchronous to keep its lines in
+    # order with the CLI's print() output.
+    global _listener
+    _stop_listener()
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    logger.addHandler(QueueHandler(log_queue))
 
     return logger
 
 class ResultLogger:
     """
     Specialized logger for recording send results in JSONL format.
+    Records go to one file per day (see segment_path), so a day's summary only
+    reads that day's records.
     """
     def __init__(self):
         self.file_path = Path(settings.RESULT_LOG_FILE)
-        # Ensure directory exists
-        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self._env = getattr(settings, 'ENV', 'unknown')
+        self._default_template = getattr(settings, 'TEMPLATE_NAME', 'unknown')
+        
+        # Append handle for the current day's segment, kept open across records
+        # (opened on first write, swapped at midnight); records are flushed once
+        # flush_every lines or flush_interval seconds have built up, before
+        # summaries, and at exit
+        self._fh = None
+        self._fh_day = None
+        self._unflushed = 0
+        self.flush_every = 100
+        self.flush_interval = 5.0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        atexit.register(self.close)
 
     def log_result(self, 
                    user_id: str, 
@@ -67,26 +132,66 @@ class ResultLogger:
         """
         Log a single send result to the JSONL file.
         """
-        from .validators import mask_phone
-        
+        timestamp = datetime.now().isoformat()
         record = {
-            "timestamp": datetime.now().isoformat(),
-            "env": getattr(settings, 'ENV', 'unknown'),
+            "timestamp": timestamp,
+            "env": self._env,
             "user_id": str(user_id),
             "phone": mask_phone(phone),  # Always mask phone in logs
             "status": status,  # success, failed, skipped
             "error": error,
             "wa_message_id": wa_message_id,
             "http_code": http_code,
-            "template_name": template_name or getattr(settings, 'TEMPLATE_NAME', 'unknown')
+            "template_name": template_name or self._default_template
         }
         
-        with open(self.file_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record) + "\n")
+        line = orjson.dumps(record) + b"\n"
+        day = timestamp[:10]
+        with self._lock:
+            if self._fh_day != day:
+                if self._fh is not None:
+                    self._fh.close()
+                self.file_path.parent.mkdir(parents=True, exist_ok=True)
+                self._fh = open(self.segment_path(day), "ab", buffering=64 * 1024)
+                self._fh_day = day
+                self._unflushed = 0
+            self._fh.write(line)
+            self._unflushed += 1
+            if self._unflushed >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._fh.flush()
+                self._unflushed = 0
+                self._last_flush = time.monotonic()
+    
+    def flush(self):
+        """Push buffered records to the result file."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+                self._unflushed = 0
+                self._last_flush = time.monotonic()
+    
+    def close(self):
+        """Flush and close the result file; the next record reopens it."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+                self._fh_day = None
+                self._unflushed = 0
+    
+    def segment_path(self, day: str) -> Path:
+        """Result file for one day, e.g. logs/send_results.2026-02-07.jsonl."""
+        return self.file_path.with_name(f"{self.file_path.stem}.{day}{self.file_path.suffix}")
     
     def generate_daily_summary(self) -> dict:
-        """Generate daily summary from result logs."""
+        """
+        Generate daily summary from result logs.
+        Reads today's segment plus the older single-file log (RESULT_LOG_FILE), if
+        one is still around. Progress per file is kept in a sidecar (<file>.offset),
+        so repeat calls on the same day only parse lines appended since the last one.
+        """
         today = datetime.now().date().isoformat()
+        self.flush()
         
         summary = {
             "date": today,
@@ -99,43 +204,106 @@ class ResultLogger:
             "skip_reasons": {}
         }
         
-        if not self.file_path.exists():
-            return summary
+        for path in (self.file_path, self.segment_path(today)):
+            if not path.exists():
+                continue
+            try:
+                counts = self._summarize_file(path, today)
+            except Exception as e:
+                logger.error(f"Error generating daily summary: {e}")
+                continue
             
-        try:
-            with open(self.file_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    try:
-                        record = json.loads(line.strip())
-                        record_date = record.get("timestamp", "")[:10]  # Get YYYY-MM-DD part
-                        
-                        if record_date != today:
-                            continue
-                            
-                        summary["total_selected"] += 1
-                        
-                        status = record.get("status", "unknown")
-                        if status == "success":
-                            summary["sent"] += 1
-                        elif status == "failed":
-                            summary["failed"] += 1
-                            # Track error codes
-                            http_code = record.get("http_code")
-                            if http_code:
-                                summary["error_codes"][str(http_code)] = summary["error_codes"].get(str(http_code), 0) + 1
-                        elif status == "skipped":
-                            summary["skipped"] += 1
-                            # Track skip reasons
-                            error = record.get("error", "unknown reason")
-                            summary["skip_reasons"][error] = summary["skip_reasons"].get(error, 0) + 1
-                            
-                    except json.JSONDecodeError:
-                        continue
-        except Exception as e:
-            logger.error(f"Error generating daily summary: {e}")
+            for key in ("total_selected", "sent", "failed", "skipped"):
+                summary[key] += counts[key]
+            for key in ("error_codes", "skip_reasons"):
+                for name, n in counts[key].items():
+                    summary[key][name] = summary[key].get(name, 0) + n
             
         return summary
     
+    def _summarize_file(self, path: Path, today: str) -> dict:
+        """Count today's records in one result file, resuming from its sidecar offset."""
+        counts = {"total_selected": 0, "sent": 0, "failed": 0, "skipped": 0,
+                  "error_codes": {}, "skip_reasons": {}}
+        
+        # "timestamp" is the first key of every record, so today's date always sits
+        # near the start of the line; checking for it there skips parsing older rows
+        today_bytes = today.encode()
+        cursor_path = path.with_name(path.name + ".offset")
+        
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            head = f.readline()[:40].decode("utf-8", "replace")  # inodes get reused, so also match the first record
+            saved = self._load_tail_cursor(cursor_path)
+            # Resume only if it is still the same file, the same day, and it hasn't shrunk
+            if (saved and saved.get("inode") == stat.st_ino and saved.get("head") == head
+                    and saved.get("date") == today and saved.get("offset", 0) <= stat.st_size):
+                counts.update(saved["summary"])
+                f.seek(saved["offset"])
+            else:
+                _seek_to_day(f, today_bytes)
+            
+            offset = f.tell()
+            lines = []
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # record still being written; pick it up next time
+                offset += len(line)
+                if today_bytes in line[:40]:
+                    lines.append(line)
+        
+        # Decode the whole tail in one orjson call as a JSON array; only if some
+        # line is malformed fall back to parsing line by line and dropping it
+        try:
+            records = orjson.loads(b"[" + b",".join(lines) + b"]")
+        except orjson.JSONDecodeError:
+            records = []
+            for line in lines:
+                try:
+                    records.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    continue
+        
+        error_codes = counts["error_codes"]
+        skip_reasons = counts["skip_reasons"]
+        for record in records:
+            if record.get("timestamp", "")[:10] != today:  # Get YYYY-MM-DD part
+                continue
+                
+            counts["total_selected"] += 1
+            
+            status = record.get("status", "unknown")
+            if status == "success":
+                counts["sent"] += 1
+            elif status == "failed":
+                counts["failed"] += 1
+                # Track error codes
+                http_code = record.get("http_code")
+                if http_code:
+                    error_codes[str(http_code)] = error_codes.get(str(http_code), 0) + 1
+            elif status == "skipped":
+                counts["skipped"] += 1
+                # Track skip reasons
+                error = record.get("error", "unknown reason")
+                skip_reasons[error] = skip_reasons.get(error, 0) + 1
+        
+        self._save_tail_cursor(cursor_path, {"inode": stat.st_ino, "head": head, "date": today,
+                                             "offset": offset, "summary": counts})
+        return counts
+    
+    def _load_tail_cursor(self, cursor_path: Path) -> Optional[dict]:
+        """Read a saved summary position, or None if missing or unreadable."""
+        try:
+            return orjson.loads(cursor_path.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+    
+    def _save_tail_cursor(self, cursor_path: Path, cursor: dict):
+        try:
+            cursor_path.write_bytes(orjson.dumps(cursor))
+        except OSError as e:
+            logger.warning(f"Could not save summary offset: {e}")
+    
     def log_daily_summary(self):
         """Log daily summary to main log file."""
         summary = self.generate_daily_summary()
@@ -1,63 +1,198 @@
 import argparse
+import heapq
+import itertools
+import random
+import re
 import sys
 import time
-import json
-from typing import List
+import orjson
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
 from .config import settings
-from .database import db
-from .whatsapp_client import wa_client
-from .rate_limiter import limiter
+from .database import get_db
+from .whatsapp_client import retry_after_seconds, wa_client
+from .rate_limiter import Breaker, limiter
 from .logger import logger, result_logger
 from .validators import validate_phone, mask_phone
 
+# Retry classification tables, built once at import
+_NON_RETRY_HTTP = frozenset({400, 401, 403, 404, 422})  # Bad request, unauthorized, forbidden, not found, unprocessable
+_RETRY_HTTP = frozenset({429, 500, 502, 503, 504})  # Rate limited, server errors
+# Message patterns, matched case-insensitively
+_NON_RETRY_PATTERNS = (
+    'template not found',
+    'permission denied',
+    'invalid recipient',
+    'policy violation',
+    'compliance',
+    'unauthorized',
+    'forbidden'
+)
+_RETRY_PATTERNS = (  # timeouts, connection issues
+    'timeout',
+    'connection',
+    'network',
+    'temporarily unavailable'
+)
+# One escaped alternation per group, so each is a single regex scan
+_NON_RETRY_RE = re.compile('|'.join(map(re.escape, _NON_RETRY_PATTERNS)), re.IGNORECASE)
+_RETRY_RE = re.compile('|'.join(map(re.escape, _RETRY_PATTERNS)), re.IGNORECASE)
+
+# Ceiling for one in-run retry wait (a Retry-After included), in seconds
+_RETRY_BACKOFF_CAP = 60.0
+
 def should_retry_error(error: Exception, http_code: int = None) -> bool:
     """
     Categorize errors into retryable vs non-retryable.
     Returns True if error should be retried, False otherwise.
     """
     # Never retry these HTTP codes
-    non_retry_codes = {400, 401, 403, 404, 422}  # Bad request, unauthorized, forbidden, not found, unprocessable
-    if http_code in non_retry_codes:
+    if http_code in _NON_RETRY_HTTP:
         return False
     
     # Always retry these
-    retry_codes = {500, 502, 503, 504}  # Server errors
-    if http_code in retry_codes:
+    if http_code in _RETRY_HTTP:
         return True
     
-    # Check error message for specific patterns
-    error_str = str(error).lower()
-    
+    # Only now is the message needed
+    return _classify_message(str(error))
+
+# Failures cluster (one upstream problem repeats the same message), so each
+# distinct message is classified once
+@lru_cache(maxsize=1024)
+def _classify_message(error_str: str) -> bool:
     # Never retry
-    non_retry_patterns = [
-        'template not found',
-        'permission denied',
-        'invalid recipient',
-        'policy violation',
-        'compliance',
-        'unauthorized',
-        'forbidden'
-    ]
-    
-    for pattern in non_retry_patterns:
-        if pattern in error_str:
-            return False
+    if _NON_RETRY_RE.search(error_str):
+        return False
     
     # Retry patterns (timeouts, connection issues)
-    retry_patterns = [
-        'timeout',
-        'connection',
-        'network',
-        'temporarily unavailable'
-    ]
-    
-    for pattern in retry_patterns:
-        if pattern in error_str:
-            return True
+    if _RETRY_RE.search(error_str):
+        return True
     
     # Default: don't retry unknown errors
     return False
 
+# A run only ever sees a handful of level names, so each is formatted once
+@lru_cache(maxsize=64)
+def _display_level(user_level) -> str:
+    # Professional capitalization (Mid-Senior -> Mid-Senior); not str.title(),
+    # which would also capitalize after hyphens and apostrophes
+    if user_level:
+        return " ".join([w.capitalize() for w in str(user_level).split()])
+    return "Qualified"
+
+def _run_inline(fn, *args, **kwargs) -> Future:
+    """Call fn now and wrap the outcome in a completed Future (the serial stand-in for pool.submit)."""
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+class _Attempt:
+    """One recipient's send, carried from dispatch through any in-run retries."""
+    __slots__ = ('clean_phone', 'user_id', 'user_level', 'user_list_id', 'campaign_key',
+                 'attempt', 'prev_delay')
+    
+    def __init__(self, user: dict, clean_phone: str, level_name, list_id, campaign_key: str):
+        self.clean_phone = clean_phone
+        self.user_id = user.get('id')
+        self.user_level = user.get('experience_level', level_name)
+        self.user_list_id = user.get('list_id', list_id)
+        self.campaign_key = campaign_key
+        self.attempt = 0  # retries so far
+        self.prev_delay = settings.RETRY_BACKOFF_SECONDS  # last retry wait, for the jitter
+
+def _record_sent(db, send: _Attempt, response: dict) -> str:
+    """Persist one successful send; returns its WhatsApp message id."""
+    wa_message_id = response.get('messages', [{}])[0].get('id')
+    db.buffer_send(send.clean_phone, send.campaign_key, 'success',
+                   experience_level=send.user_level, list_id=send.user_list_id, wamid=wa_message_id)
+    result_logger.log_result(send.user_id, send.clean_phone, "success", wa_message_id=wa_message_id, http_code=200)
+    return wa_message_id
+
+def _record_failed(db, send: _Attempt, error: Exception, http_code: Optional[int]):
+    """Persist one final send failure."""
+    db.buffer_send(send.clean_phone, send.campaign_key, 'failed',
+                   experience_level=send.user_level, list_id=send.user_list_id, error=str(error))
+    result_logger.log_result(send.user_id, send.clean_phone, "failed", error=str(error), http_code=http_code)
+
+def _record_finished(db, in_flight: dict):
+    """
+    Record the sends of an interrupted run that finished after all (the pool has
+    been shut down), so a message that went out is never sent again next run.
+    """
+    for future, send in in_flight.items():
+        if future.cancelled():
+            continue
+        e = future.exception()
+        if e is None:
+            _record_sent(db, send, future.result()[0])
+        else:
+            _record_failed(db, send, e, getattr(getattr(e, 'response', None), 'status_code', None))
+
+class _RetryQueue:
+    """Retryable failures waiting for another attempt within this run, soonest first."""
+    def __init__(self):
+        self._heap = []  # (ready_at, seq, send, error, http_code), keyed on monotonic time
+        self._seq = itertools.count()
+    
+    def __len__(self) -> int:
+        return len(self._heap)
+    
+    def schedule(self, send: _Attempt, error: Exception, http_code: Optional[int]) -> float:
+        """Queue send's next attempt; returns the seconds until it is due."""
+        retry_after = retry_after_seconds(getattr(error, 'response', None))
+        if retry_after is not None:
+            delay = min(_RETRY_BACKOFF_CAP, retry_after)  # the API's own wait comes first
+        else:
+            # Decorrelated jitter: drawn between the base and 3x this recipient's
+            # previous wait, so concurrent retries don't arrive in lockstep
+            delay = min(_RETRY_BACKOFF_CAP, random.uniform(settings.RETRY_BACKOFF_SECONDS, send.prev_delay * 3))
+            send.prev_delay = delay
+        send.attempt += 1
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), send, error, http_code))
+        return delay
+    
+    def wait_time(self) -> Optional[float]:
+        """Seconds until the next retry is due (0 if one already is), or None if none are queued."""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
+    
+    def pop_due(self) -> Optional[_Attempt]:
+        """The next retry if it is due, else None."""
+        if self._heap and self._heap[0][0] <= time.monotonic():
+            return heapq.heappop(self._heap)[2]
+        return None
+    
+    def drain(self) -> List[Tuple[_Attempt, Exception, Optional[int]]]:
+        """Remove every queued retry, returning (send, last error, http_code) for each."""
+        pending = [entry[2:] for entry in self._heap]
+        self._heap.clear()
+        return pending
+
+class _Scan:
+    """A list's recipient scan, with its first page fetched on a background thread."""
+    def __init__(self, scan: Iterator[dict], prefetcher: ThreadPoolExecutor):
+        self._scan = scan
+        self._first = prefetcher.submit(next, scan, None)
+    
+    def __iter__(self) -> Iterator[dict]:
+        """Recipients of the scan; fetch errors surface here, on the consumer."""
+        user = self._first.result()
+        if user is not None:
+            yield user
+            yield from self._scan
+    
+    def discard(self):
+        """Stop a scan that won't be read any further."""
+        if not self._first.cancel():
+            self._first.exception()  # wait out an in-progress first page; its outcome no longer matters
+        self._scan.close()
+
 def cmd_validate():
     """
     Validate configuration and connectivity.
@@ -81,7 +216,7 @@ def cmd_validate():
         
     # 3. Check Database (Brevo)
     print("Checking Brevo connection...")
-    if db.verify_connection():
+    if get_db().verify_connection():
         print("✅ Brevo API connected")
     else:
         print("❌ Brevo connection failed")
@@ -113,7 +248,7 @@ def cmd_dry_run(limit: int = None, experience: str = None, campaign_id: str = No
     # Get targeting mapping (via Category Folder or Env Map)
     if category:
         print(f"📂 Identifying lists in category folder: {category}...")
-        experience_map = db.get_lists_by_folder_name(category)
+        experience_map = get_db().get_lists_by_folder_name(category)
         if not experience_map:
             print(f"❌ Error: Could not find lists for category '{category}'")
             return
@@ -158,24 +293,26 @@ def cmd_dry_run(limit: int = None, experience: str = None, campaign_id: str = No
             print(f"📊 Default targeting")
         
         try:
-            users = db.get_eligible_recipients(
+            users = get_db().iter_eligible_recipients(
                 limit=overall_limit,
                 list_id=list_id,
                 campaign_key=campaign_key,
                 experience_level=level_name
             )
-            print(f"   Found {len(users)} eligible recipients")
-            total_eligible += len(users)
+            # Keep only the samples shown; the rest of the stream is just counted
+            samples = list(itertools.islice(users, 5))
+            found = len(samples) + sum(1 for _ in users)
+            print(f"   Found {found} eligible recipients")
+            total_eligible += found
             
-            if users:
-                display_count = min(len(users), 5)
-                print(f"   Sample recipients (showing {display_count} of {len(users)}):")
-                for i, user in enumerate(users[:5]):
+            if samples:
+                print(f"   Sample recipients (showing {len(samples)} of {found}):")
+                for i, user in enumerate(samples):
                     masked = mask_phone(user.get('phone', ''))
                     print(f"      {i+1}. ID: {user.get('id')}, Phone: {masked}, Name: {user.get('experience_level', 'N/A')}")
                 
-                if len(users) > 5:
-                    print(f"      ... and {len(users) - 5} others in this list\n")
+                if found > 5:
+                    print(f"      ... and {found - 5} others in this list\n")
                 else:
                     print()
             else:
@@ -195,30 +332,35 @@ def cmd_simulate_send(limit: int = None):
     print("Simulating send operation...")
     
     try:
-        users = db.get_eligible_recipients(limit=limit or 5)  # Default to 5 for simulation
+        users = get_db().get_eligible_recipients(limit=limit or 5)  # Default to 5 for simulation
         print(f"Found {len(users)} eligible recipients")
         
         print("\nSimulated payloads:")
+        # Everything but the recipient is the same for every user; encode it once
+        # around a placeholder and splice each phone number in
+        preview = orjson.dumps({
+            "messaging_product": "whatsapp",
+            "to": "\x00",
+            "type": "template",
+            "template": {
+                "name": settings.TEMPLATE_NAME,
+                "language": {
+                    "code": settings.LANGUAGE_CODE
+                }
+            }
+        }, option=orjson.OPT_INDENT_2).decode()
+        preview_prefix, preview_suffix = preview.split('"\\u0000"', 1)
+        url = f"{settings.api_base_url}/{settings.PHONE_NUMBER_ID}/messages"
+        
         for i, user in enumerate(users[:3]):  # Show first 3
             phone = user.get('phone')
             user_id = user.get('id')
             
             try:
                 clean_phone = validate_phone(phone)
-                payload = {
-                    "messaging_product": "whatsapp",
-                    "to": clean_phone,
-                    "type": "template",
-                    "template": {
-                        "name": settings.TEMPLATE_NAME,
-                        "language": {
-                            "code": settings.LANGUAGE_CODE
-                        }
-                    }
-                }
                 print(f"  {i+1}. User {user_id} ({mask_phone(clean_phone)}):")
-                print(f"     URL: {settings.api_base_url}/{settings.PHONE_NUMBER_ID}/messages")
-                print(f"     Payload: {json.dumps(payload, indent=8)}")
+                print(f"     URL: {url}")
+                print(f"     Payload: {preview_prefix}\"{clean_phone}\"{preview_suffix}")
                 print()
             except ValueError as e:
                 print(f"  {i+1}. User {user_id}: SKIP - {e}")
@@ -249,6 +391,7 @@ def cmd_send(limit: int = None, confirm: bool = False,
         return
         
     # Create tables if we are in dev mode (sqlite)
+    db = get_db()
     db.create_tables_if_dev()
     
     effective_campaign_id = campaign_id or settings.JOB_CAMPAIGN_ID
@@ -317,135 +460,271 @@ def cmd_send(limit: int = None, confirm: bool = False,
     count_failed = 0
     count_skipped = 0
     
-    # Process each list targeted
-    for level_name in target_levels:
-        if count_success >= run_limit:
-            print("✅ Global run limit reached across all lists")
-            break
-            
-        remaining_limit = run_limit - count_success
-        
-        if level_name:
-            list_id = experience_map.get(level_name)
-            template_name = settings.get_template_name_for_level(level_name)
-            campaign_key = f"{effective_campaign_id}:{template_name}"
-            
-            print(f"\n📊 Processing List: {level_name} (ID: {list_id}, Template: {template_name})")
-            logger.info(f"Fetching recipients from list '{level_name}' (ID: {list_id})")
-        else:
-            # Legacy/Generic mode
-            list_id = None
-            template_name = settings.TEMPLATE_NAME
-            campaign_key = effective_campaign_id or template_name
-            print(f"\n📊 Processing default batch (Template: {template_name})")
-        
-        try:
-            users = db.get_eligible_recipients(
-                limit=remaining_limit * 2,  # Fetch extra in case some fail validation
-                list_id=list_id,
-                campaign_key=campaign_key,
-                experience_level=level_name
-            )
-        except Exception as e:
-            logger.critical(f"Failed to fetch recipients for {level_name or 'default'}: {e}")
-            continue
-
-        print(f"   Found: {len(users)} eligible recipients")
-        logger.info(f"Fetched {len(users)} eligible recipients for {level_name or 'default'}")
-        
-        level_success = 0
-        
+    # With SEND_CONCURRENCY > 1, up to that many API calls overlap on a thread pool;
+    # at 1 each send runs inline, exactly as a plain loop would
+    concurrency = max(1, settings.SEND_CONCURRENCY)
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="wa-send") if concurrency > 1 else None
+    submit = pool.submit if pool else _run_inline
+    # Pauses sending on an error spike instead of abandoning the batch
+    breaker = Breaker()
+    # Per-send calls bound once, outside the hot loop
+    can_send = limiter.can_send
+    wait_for_slot = limiter.wait_for_slot
+    record_success = limiter.record_success
+    record_failure = limiter.record_failure
+    log_result = result_logger.log_result
+    send_message = wa_client.send_template_message
+    
+    def sendable(users):
+        """Validate each phone once as users stream in; yield (user, clean_phone) for valid ones."""
+        nonlocal count_skipped
         for user in users:
-            # Check error spike stop
-            if limiter.should_stop_due_to_errors():
-                logger.error(f"❌ Stopping due to {limiter.consecutive_failures} consecutive failures (error spike detected)")
-                break
-                
-            # Check global stopping conditions
-            if count_success >= run_limit:
-                logger.info("Run limit reached. Stopping.")
-                break
-                
-            if not limiter.can_send(user['id']):
-                if limiter.sent_count >= limiter.daily_limit:
-                    logger.warning("Daily limit reached (global). Stopping.")
-                    break
-                count_skipped += 1
-                continue
-                
             phone = user.get('phone')
-            user_id = user.get('id')
-            user_level = user.get('experience_level', level)
-            user_list_id = user.get('list_id', list_id)
-            
-            # Validate phone (already validated but safety check)
             try:
                 clean_phone = validate_phone(phone)
             except ValueError as e:
-                logger.warning(f"Skipping user {user_id}: Invalid phone {mask_phone(phone)} - {e}")
-                result_logger.log_result(user_id, phone, "skipped", f"Invalid phone: {e}")
+                logger.warning(f"Skipping user {user.get('id')}: Invalid phone {mask_phone(phone)} - {e}")
+                log_result(user.get('id'), phone, "skipped", f"Invalid phone: {e}")
                 count_skipped += 1
                 continue
-
-            # Enforce rate limit delay
-            limiter.wait_for_slot()
+            yield user, clean_phone
+    
+    def level_target(level_name):
+        """(list_id, template_name, campaign_key) for one targeted list."""
+        if level_name:
+            template_name = settings.get_template_name_for_level(level_name)
+            return experience_map.get(level_name), template_name, f"{effective_campaign_id}:{template_name}"
+        # Legacy/Generic mode
+        return None, settings.TEMPLATE_NAME, effective_campaign_id or settings.TEMPLATE_NAME
+    
+    # Fetches a list's first page in the background, so the next list is ready
+    # by the time the current one has finished sending
+    prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="brevo-prefetch")
+    
+    def start_scan(level_name, scan_limit):
+        """Open a list's recipient scan, fetching its first page in the background."""
+        list_id, _, campaign_key = level_target(level_name)
+        # Streamed: Brevo pages are fetched as the send loop consumes recipients
+        return _Scan(db.iter_eligible_recipients(
+            limit=scan_limit,
+            list_id=list_id,
+            campaign_key=campaign_key,
+            experience_level=level_name
+        ), prefetcher)
+    
+    # Buffered history and result rows are flushed even if the run is interrupted,
+    # so a long-lived caller (the web UI) never keeps them queued
+    prefetched = None  # (level index, _Scan) for the next list, already started
+    in_flight = {}  # future -> _Attempt
+    aborted = False  # the breaker gave up on the upstream; no later list is tried
+    try:
+        # Process each list targeted
+        for index, level_name in enumerate(target_levels):
+            if count_success >= run_limit:
+                print("✅ Global run limit reached across all lists")
+                break
+            if aborted:
+                print("❌ Sending stopped: the WhatsApp API is not recovering")
+                break
             
-            # Send Message
-            try:
-                logger.info(f"Sending to user {user_id} ({mask_phone(clean_phone)}) [{user_level or 'default'}]...")
-                
-                # Prepare message variables
-                user_vars = body_variables.copy() if body_variables else {}
-                
-                # Auto-inject context for "One Template" strategy
-                if 'category' not in user_vars:
-                    user_vars['category'] = category or "General"
-                
-                if 'experience' not in user_vars:
-                    # Professional capitalization (Mid-Senior -> Mid-Senior)
-                    if user_level:
-                        display_level = " ".join([w.capitalize() for w in str(user_level).split()])
-                    else:
-                        display_level = "Qualified"
-                    user_vars['experience'] = display_level
-
-                response, status = wa_client.send_template_message(
-                    to_phone=clean_phone,
-                    template_name=template_name,
-                    body_variables=user_vars
-                )
-                
-                wa_message_id = response.get('messages', [{}])[0].get('id')
+            remaining_limit = run_limit - count_success
+            list_id, template_name, campaign_key = level_target(level_name)
+        
+            if level_name:
+                print(f"\n📊 Processing List: {level_name} (ID: {list_id}, Template: {template_name})")
+                logger.info(f"Fetching recipients from list '{level_name}' (ID: {list_id})")
+            else:
+                print(f"\n📊 Processing default batch (Template: {template_name})")
+        
+            if prefetched and prefetched[0] == index:
+                scan = prefetched[1]
+                prefetched = None
+            else:
+                scan = start_scan(level_name, remaining_limit * 2)  # Fetch extra in case some fail validation
+            
+            # Start on the next list while this one sends, unless it shares this list's
+            # campaign key and so has to be deduplicated against what is sent here
+            if index + 1 < len(target_levels):
+                next_level = target_levels[index + 1]
+                if level_target(next_level)[2] != campaign_key:
+                    # remaining_limit is an upper bound; the scan only reads what is consumed
+                    prefetched = (index + 1, start_scan(next_level, remaining_limit * 2))
+            
+            users_iter = sendable(scan)
+            fetched = 0
+        
+            level_success = 0
+            in_flight = {}
+            retries = _RetryQueue()
+            probe = None  # the one send allowed through a half-open breaker
+            dispatching = True
+            scan_done = False  # every recipient of the scan has been read
+            scan_failed = False
+        
+            while True:
+                retry_wait = None
+                # Hand out sends while there is a free slot. Pacing, limits and dedup
+                # stay on this thread; only the API call itself runs on the pool.
+                while dispatching and len(in_flight) < concurrency:
+                    # Check error spike: pause, then probe before resuming
+                    if breaker.state == 'closed' and limiter.should_stop_due_to_errors():
+                        breaker.open()
+                        logger.error(f"❌ Pausing sends for {breaker.backoff}s after {limiter.consecutive_failures} consecutive failures (error spike detected)")
+                    if breaker.state == 'half_open':
+                        break  # Wait for the probe's outcome
+                    if breaker.state == 'open':
+                        remaining = breaker.remaining()
+                        if remaining > 0:
+                            if in_flight:
+                                retry_wait = remaining
+                                break
+                            time.sleep(remaining)
+                            continue
+                    
+                    # Check global stopping conditions (counting sends still in flight)
+                    if count_success + len(in_flight) >= run_limit:
+                        if count_success >= run_limit:
+                            logger.info("Run limit reached. Stopping.")
+                        break
                 
-                # Record success with campaign_key
-                limiter.record_success(user_id)
-                db.record_send(clean_phone, campaign_key, 'success', 
-                             experience_level=user_level, list_id=user_list_id, wamid=wa_message_id)
-                result_logger.log_result(user_id, clean_phone, "success", wa_message_id=wa_message_id, http_code=200)
+                    # Due retries go ahead of fresh users
+                    send = retries.pop_due()
+                    if send is None:
+                        try:
+                            user, clean_phone = next(users_iter, (None, None))
+                            scan_done = user is None
+                        except Exception as e:
+                            logger.critical(f"Failed to fetch recipients for {level_name or 'default'}: {e}")
+                            user = None  # The scan is over; later next() calls return None
+                            scan_failed = True
+                        if user is None:
+                            retry_wait = retries.wait_time()
+                            if retry_wait is None or in_flight:
+                                # Only in-flight sends left (which may still reschedule),
+                                # or results to collect until the next retry is due
+                                break
+                            time.sleep(retry_wait)
+                            continue
+                        fetched += 1
+                        send = _Attempt(user, clean_phone, level_name, list_id, campaign_key)
+                    
+                    if not can_send(send.user_id) or limiter.sent_count + len(in_flight) >= limiter.daily_limit:
+                        if limiter.sent_count + len(in_flight) >= limiter.daily_limit:
+                            logger.warning("Daily limit reached (global). Stopping.")
+                            dispatching = False
+                            break
+                        count_skipped += 1
+                        continue
                 
-                logger.info(f"✅ Sent to {user_id}. WA ID: {wa_message_id}")
-                count_success += 1
-                level_success += 1
+                    # Enforce rate limit delay
+                    wait_for_slot()
                 
-            except Exception as e:
-                # Extract status code if available
-                code = getattr(getattr(e, 'response', None), 'status_code', None)
+                    logger.info(f"Sending to user {send.user_id} ({mask_phone(send.clean_phone)}) [{send.user_level or 'default'}]...")
                 
-                # Determine if this should be retried
-                retryable = should_retry_error(e, code)
+                    # Prepare message variables
+                    user_vars = body_variables.copy() if body_variables else {}
                 
-                logger.error(f"❌ Failed to send to {user_id}: {e} (retryable: {retryable})")
-                limiter.record_failure()
+                    # Auto-inject context for "One Template" strategy
+                    if 'category' not in user_vars:
+                        user_vars['category'] = category or "General"
                 
-                # Record failure with campaign_key
-                db.record_send(clean_phone, campaign_key, 'failed',
-                             experience_level=user_level, list_id=user_list_id, error=str(e))
-                result_logger.log_result(user_id, clean_phone, "failed", error=str(e), http_code=code)
+                    if 'experience' not in user_vars:
+                        user_vars['experience'] = _display_level(send.user_level)
+
+                    # Send Message: one POST per attempt, failures are rescheduled below
+                    future = submit(
+                        send_message,
+                        to_phone=send.clean_phone,
+                        template_name=template_name,
+                        body_variables=user_vars
+                    )
+                    in_flight[future] = send
+                    if breaker.state == 'open':
+                        breaker.half_open()
+                        probe = future
+            
+                if not in_flight:
+                    break
+            
+                done, _ = wait(in_flight, timeout=retry_wait, return_when=FIRST_COMPLETED)
+                for future in done:
+                    send = in_flight.pop(future)
+                    try:
+                        response, status = future.result()
+                    
+                        record_success(send.user_id)
+                        if breaker.state != 'closed':
+                            logger.info("Send succeeded, resuming normal sending")
+                            breaker.record_success()
+                        wa_message_id = _record_sent(db, send, response)
+                    
+                        logger.info(f"✅ Sent to {send.user_id}. WA ID: {wa_message_id}")
+                        count_success += 1
+                        level_success += 1
+                    
+                    except Exception as e:
+                        # Extract status code if available
+                        code = getattr(getattr(e, 'response', None), 'status_code', None)
+                    
+                        # Determine if this should be retried
+                        retryable = should_retry_error(e, code)
+                    
+                        logger.error(f"❌ Failed to send to {send.user_id}: {e} (retryable: {retryable})")
+                        record_failure()
+                        if code == 429:
+                            limiter.record_rate_limited()
+                        if future is probe:
+                            if breaker.record_failure():
+                                logger.warning(f"Probe send failed, pausing sends for {breaker.backoff}s")
+                            else:
+                                logger.error(f"❌ Stopping due to {limiter.consecutive_failures} consecutive failures (error spike detected)")
+                                dispatching = False
+                                aborted = True
+                    
+                        # Once sending has stopped nothing is rescheduled: it would never go out
+                        if retryable and dispatching and send.attempt < settings.MAX_RETRIES:
+                            delay = retries.schedule(send, e, code)
+                            logger.info(f"Rescheduling {send.user_id} (attempt {send.attempt + 1}) in {delay:.1f}s")
+                            continue
+                    
+                        _record_failed(db, send, e, code)
+                        count_failed += 1
+        
+            # Stop the scan (and its read-ahead) if sending ended before it did
+            users_iter.close()
+            scan.discard()
+            print(f"   Found: {fetched} eligible recipients")
+            logger.info(f"Fetched {fetched} eligible recipients for {level_name or 'default'}")
+        
+            # Retries still waiting when sending stopped are final failures
+            leftover = retries.drain()
+            for send, e, code in leftover:
+                _record_failed(db, send, e, code)
                 count_failed += 1
         
-        if level:
-            print(f"   ✅ Sent {level_success} messages to {level.upper()} level")
+            # Persist this level's history before the next list is deduplicated against it
+            db.flush_sends()
             
+            # An incremental scan's cursor only moves once all of its recipients
+            # were sent or recorded; a stop, a fetch error or retries cut short
+            # leave the window to be scanned again next run
+            if scan_done and not scan_failed and dispatching and not leftover:
+                db.commit_scan_cursor(list_id=list_id, campaign_key=campaign_key)
+        
+            if level_name:
+                print(f"   ✅ Sent {level_success} messages to {level_name.upper()} level")
+    finally:
+        if prefetched:
+            prefetched[1].discard()
+        prefetcher.shutdown()
+        if pool:
+            # Waits for the sends already running; queued ones are cancelled
+            pool.shutdown(cancel_futures=True)
+        _record_finished(db, in_flight)
+        db.flush_sends()
+        result_logger.flush()
+        wa_client.close()
+
     # Log final summary
     logger.info(f"Batch completed. Success: {count_success}, Failed: {count_failed}, Skipped: {count_skipped}")
     print(f"\n📈 Final Summary: ✅ {count_success} sent | ❌ {count_failed} failed | ⏭️ {count_skipped} skipped")
@@ -1,9 +1,17 @@
+import threading
 import time
 from datetime import datetime, timedelta
 from typing import Set
 from .config import settings
 from .logger import logger, result_logger
 
+# Adaptive pacing: each 429 cuts the send rate to 80%, never below a tenth of the
+# configured rate; every 20 successes in a row win back 5%, up to the configured rate
+_THROTTLE_FACTOR = 0.8
+_MIN_RATE_FRACTION = 0.1
+_RECOVER_AFTER = 20
+_RECOVER_FACTOR = 1.05
+
 class RateLimiter:
     """
     Manages sending rates, daily limits, and idempotency.
@@ -13,6 +21,17 @@ class RateLimiter:
         self.sent_count = 0
         self.sent_users: Set[str] = set()
         self.last_send_time = 0
+        # Token bucket pacing; a non-positive delay means no pacing at all
+        self.rate = 1 / settings.SEND_DELAY_SECONDS if settings.SEND_DELAY_SECONDS > 0 else float('inf')
+        self.capacity = max(1, settings.BURST_CAPACITY)
+        self.tokens = float(self.capacity)
+        self.last_refill = time.monotonic()
+        # The configured rate is a ceiling: a 429 slows the bucket down, and a
+        # run of successes walks it back up
+        self.max_rate = self.rate
+        self.success_streak = 0
+        # Guards the bucket and counters; the limiter is shared by every thread that sends
+        self._lock = threading.Lock()
         self.consecutive_failures = 0
         self.max_consecutive_failures = 3
         
@@ -20,6 +39,10 @@ class RateLimiter:
         """
         Check if we can send a message to this user.
         Checks: daily limit, duplicate send in this run.
+        
+        Dedup across runs (and crashes) is not kept here: every success is
+        written to send_history, and the recipient scan excludes phones already
+        sent for the campaign, so a rerun never sees them.
         """
         if self.sent_count >= self.daily_limit:
             logger.warning("Daily limit reached. stopping sends.")
@@ -33,30 +56,56 @@ class RateLimiter:
         
     def wait_for_slot(self):
         """
-        Enforce minimum delay between sends.
+        Block until a send token is available (token bucket).
+
+        Tokens refill at one per SEND_DELAY_SECONDS up to BURST_CAPACITY, so
+        after an idle stretch up to that many sends may go back-to-back.
         """
-        now = time.time()
-        elapsed = now - self.last_send_time
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            # Take the token now, even if it has not refilled yet; a negative
+            # balance is a reservation that later callers queue behind
+            self.tokens -= 1
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0
+            self.last_send_time = time.time()
         
-        if elapsed < settings.SEND_DELAY_SECONDS:
-            wait_time = settings.SEND_DELAY_SECONDS - elapsed
+        # Sleep outside the lock so other senders can reserve their own slots
+        if wait_time > 0:
             time.sleep(wait_time)
             
     def record_success(self, user_id: str):
         """
         Record a successful send.
         """
-        self.sent_count += 1
-        self.sent_users.add(str(user_id))
-        self.last_send_time = time.time()
-        self.consecutive_failures = 0  # Reset failure counter on success
+        with self._lock:
+            self.sent_count += 1
+            self.sent_users.add(str(user_id))
+            self.last_send_time = time.time()
+            self.consecutive_failures = 0  # Reset failure counter on success
+            self.success_streak += 1
+            if self.success_streak >= _RECOVER_AFTER and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate * _RECOVER_FACTOR)
+                self.success_streak = 0
         
     def record_failure(self):
         """
         Record a failure (logs only, but updates timing to prevent hammering).
         """
-        self.last_send_time = time.time()
-        self.consecutive_failures += 1
+        with self._lock:
+            self.last_send_time = time.time()
+            self.consecutive_failures += 1
+            self.success_streak = 0
+    
+    def record_rate_limited(self):
+        """
+        Slow the send rate after the API answered 429 (Too Many Requests).
+        """
+        with self._lock:
+            self.rate = max(self.max_rate * _MIN_RATE_FRACTION, self.rate * _THROTTLE_FACTOR)
+            self.success_streak = 0
+        logger.warning(f"Rate limited by the API; slowing to {1 / self.rate:.2f}s between sends")
         
     def should_stop_due_to_errors(self) -> bool:
         """
@@ -64,5 +113,49 @@ class RateLimiter:
         """
         return self.consecutive_failures >= self.max_consecutive_failures
 
+class Breaker:
+    """
+    Circuit breaker for a run of consecutive send failures.
+
+    While open, sends pause for the current backoff window; once it has
+    passed, one probe is let through (half-open). A successful probe closes
+    the breaker, a failed one doubles the window up to max_backoff. A probe
+    that fails once the window is at max_backoff gives up for good.
+    """
+    def __init__(self, base_backoff: float = 0.5, max_backoff: float = 60.0):
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self.backoff = base_backoff
+        
+    def open(self):
+        self.state = 'open'
+        self.opened_at = time.monotonic()
+        
+    def remaining(self) -> float:
+        """
+        Seconds left in the open window (0 once a probe may go out).
+        """
+        return max(0.0, self.opened_at + self.backoff - time.monotonic())
+        
+    def half_open(self):
+        self.state = 'half_open'
+        
+    def record_success(self):
+        self.state = 'closed'
+        self.backoff = self.base_backoff
+        
+    def record_failure(self) -> bool:
+        """
+        Record a failed probe. Returns False if the window is already at its
+        maximum, i.e. the upstream is not recovering and sending should stop.
+        """
+        if self.backoff >= self.max_backoff:
+            return False
+        self.backoff = min(self.max_backoff, self.backoff * 2)
+        self.open()
+        return True
+
 # Global rate limiter instance
 limiter = RateLimiter()
@@ -1,5 +1,13 @@
 import re
+from functools import lru_cache
 
+_NON_DIGIT_RE = re.compile(r'\D')
+# Every ASCII byte except 0-9, for bytes.translate's delete argument
+_NON_DIGIT_ASCII = bytes(c for c in range(128) if not chr(c).isdigit())
+
+# Results are cached because the same numbers recur across experience levels and
+# campaigns within a session; invalid numbers raise and so are never cached
+@lru_cache(maxsize=8192)
 def validate_phone(phone: str) -> str:
     """
     Validate and format a phone number for WhatsApp API (E.164).
@@ -18,8 +26,14 @@ def validate_phone(phone: str) -> str:
     if not phone:
         raise ValueError("Phone number is empty")
         
-    # Remove all non-digit characters
-    cleaned = re.sub(r'\D', '', str(phone))
+    phone = phone if isinstance(phone, str) else str(phone)
+    
+    # Remove all non-digit characters: nothing to do for plain digits, a C-level
+    # byte delete for other ASCII input, and the regex for anything else
+    if phone.isascii():
+        cleaned = phone if phone.isdigit() else phone.encode('ascii').translate(None, _NON_DIGIT_ASCII).decode('ascii')
+    else:
+        cleaned = _NON_DIGIT_RE.sub('', phone)
     
     # Basic length validation (international numbers are usually 10-15 digits)
     if len(cleaned) < 10 or len(cleaned) > 15:
@@ -27,6 +41,8 @@ def validate_phone(phone: str) -> str:
         
     return cleaned
 
+# Called for nearly every log line about a recipient; same numbers repeat within a run
+@lru_cache(maxsize=4096)
 def mask_phone(phone: str) -> str:
     """
     Mask a phone number for privacy/logging.
@@ -1,20 +1,103 @@
+import orjson
 import requests
-import time
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
 from requests.exceptions import RequestException
 from .config import settings
 from .logger import logger
 
+_BODY_VARIABLE_ORDER = ('job_title', 'company', 'location', 'apply_link', 'category', 'experience')
+
+# Stands in for the recipient while a payload is encoded, so the bytes on
+# either side of it can be reused for every phone number
+_TO_PLACEHOLDER = "\x00"
+_TO_ENCODED = orjson.dumps(_TO_PLACEHOLDER)
+
+@lru_cache(maxsize=64)
+def _payload_parts(template_name: str, language_code: str, image_url: str,
+                   body_texts: Tuple[str, ...]) -> Tuple[bytes, bytes]:
+    """
+    Encode a template message payload once, split around the "to" value.
+    """
+    # Build components
+    components = [
+        {
+            "type": "header",
+            "parameters": [
+                {
+                    "type": "image",
+                    "image": {
+                        "link": image_url
+                    }
+                }
+            ]
+        }
+    ]
+    
+    # Add body variables if provided
+    if body_texts:
+        components.append({
+            "type": "body",
+            "parameters": [{"type": "text", "text": text} for text in body_texts]
+        })
+    
+    payload = {
+        "messaging_product": "whatsapp",
+        "recipient_type": "individual",
+        "to": _TO_PLACEHOLDER,
+        "type": "template",
+        "template": {
+            "name": template_name,
+            "language": {
+                "code": language_code
+            },
+            "components": components
+        }
+    }
+    prefix, suffix = orjson.dumps(payload).split(_TO_ENCODED, 1)
+    return prefix, suffix
+
+def retry_after_seconds(response) -> Optional[float]:
+    """
+    Seconds the server asked us to wait (Retry-After in its delta-seconds form), if any.
+    """
+    if response is None:
+        return None
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None  # HTTP-date form; fall back to our own backoff
+
 class WhatsAppClient:
     """
     Client for interacting with the WhatsApp Cloud API.
     """
     def __init__(self):
         self.base_url = settings.api_base_url
+        self.messages_url = f"{self.base_url}/{settings.PHONE_NUMBER_ID}/messages"
         self.headers = {
             "Authorization": f"Bearer {settings.WHATSAPP_TOKEN}",
             "Content-Type": "application/json"
         }
+        
+        # One pooled session for the whole batch so TCP/TLS connections are reused;
+        # sized for every concurrent send, with retries left to cmd_send
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=1,  # every call goes to the one Graph API host
+            pool_maxsize=max(10, settings.SEND_CONCURRENCY),
+            pool_block=False,
+            max_retries=0,
+        ))
+    
+    def close(self):
+        """Release pooled connections (the session reconnects if used again)."""
+        self.session.close()
     
     def send_template_message(self, 
                               to_phone: str, 
@@ -25,6 +108,9 @@ class WhatsAppClient:
         """
         Send a template message to a specific phone number.
         
+        Makes a single POST and raises on failure; cmd_send decides whether and
+        when to try again, so a message is never retried at two layers.
+        
         Args:
             to_phone: Recipient phone number (E.164 format without +)
             template_name: Name of the template (defaults to config)
@@ -39,93 +125,43 @@ class WhatsAppClient:
         language_code = language_code or settings.LANGUAGE_CODE
         image_url = image_url or str(settings.IMAGE_URL)
 
-        url = f"{self.base_url}/{settings.PHONE_NUMBER_ID}/messages"
+        url = self.messages_url
         
-        # Build components
-        components = [
-            {
-                "type": "header",
-                "parameters": [
-                    {
-                        "type": "image",
-                        "image": {
-                            "link": image_url
-                        }
-                    }
-                ]
-            }
-        ]
+        # WhatsApp requires variables in order: typically job_title, company, location, apply_link
+        # The order must match the template definition
+        body_texts = tuple(
+            str(body_variables[key]) for key in _BODY_VARIABLE_ORDER if key in body_variables
+        ) if body_variables else ()
         
-        # Add body variables if provided
-        if body_variables:
-            body_params = []
-            # WhatsApp requires variables in order: typically job_title, company, location, apply_link
-            # The order must match the template definition
-            for key in ['job_title', 'company', 'location', 'apply_link', 'category', 'experience']:
-                if key in body_variables:
-                    body_params.append({
-                        "type": "text",
-                        "text": str(body_variables[key])
-                    })
-            
-            if body_params:
-                components.append({
-                    "type": "body",
-                    "parameters": body_params
-                })
+        # Only the recipient differs between sends of the same template
+        prefix, suffix = _payload_parts(template_name, language_code, image_url, body_texts)
         
-        payload = {
-            "messaging_product": "whatsapp",
-            "recipient_type": "individual",
-            "to": to_phone,
-            "type": "template",
-            "template": {
-                "name": template_name,
-                "language": {
-                    "code": language_code
-                },
-                "components": components
-            }
-        }
-
-        retry_count = 0
-        last_error = None
-
-        while retry_count <= settings.MAX_RETRIES:
-            try:
-                if retry_count > 0:
-                    sleep_time = settings.RETRY_BACKOFF_SECONDS * (2 ** (retry_count - 1))
-                    logger.info(f"Retrying send to {to_phone} (Attempt {retry_count + 1}). Waiting {sleep_time}s...")
-                    time.sleep(sleep_time)
-
-                response = requests.post(url, headers=self.headers, json=payload, timeout=30)
-                
-                # Check for HTTP errors
-                response.raise_for_status()
-                
-                return response.json(), response.status_code
-                
-            except RequestException as e:
-                last_error = e
-                # Don't retry on 4xx errors (client errors) except 429 (rate limit)
-                status_code = getattr(e.response, 'status_code', 0) if e.response else 0
-                
-                if 400 <= status_code < 500 and status_code != 429:
-                    logger.error(f"Client error sending to {to_phone}: {str(e)} - Response: {e.response.text}")
-                    raise e
-                    
+        # Content-Type is already set in self.headers
+        body = prefix + orjson.dumps(to_phone) + suffix
+        
+        try:
+            response = self.session.post(url, data=body, timeout=30)
+            
+            # Check for HTTP errors
+            response.raise_for_status()
+            
+        except RequestException as e:
+            # (A Response is falsy for error statuses, so test it against None.)
+            status_code = e.response.status_code if e.response is not None else 0
+            if 400 <= status_code < 500 and status_code != 429:
+                logger.error(f"Client error sending to {to_phone}: {str(e)} - Response: {e.response.text}")
+            else:
                 logger.warning(f"Error sending to {to_phone}: {str(e)}")
-                retry_count += 1
+            raise
         
-        logger.error(f"Failed to send to {to_phone} after {settings.MAX_RETRIES} retries")
-        raise last_error
+        return orjson.loads(response.content), response.status_code
     
     def verify_connection(self) -> bool:
         """Verify WhatsApp API token and phone number ID are valid."""
         try:
             # Test by fetching phone number info
             url = f"{self.base_url}/{settings.PHONE_NUMBER_ID}"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, timeout=10)
             
             if response.status_code == 200:
                 logger.debug("WhatsApp API connection verified")
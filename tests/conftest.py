@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    # BrevoClient opens send_history.db relative to the working directory;
+    # keep tests away from the real history file.
+    monkeypatch.chdir(tmp_path)
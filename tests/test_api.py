@@ -0,0 +1,119 @@
+import io
+import sys
+import pytest
+from unittest.mock import MagicMock
+
+pytest.importorskip("fastapi")
+
+from fastapi.testclient import TestClient
+from web_ui import api
+
+
+def events(body):
+    """(id, data) of each message event in an SSE body, then the final event's name."""
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) if ": " in line else (line.rstrip(":"), "") for line in block.split("\n"))
+        parsed.append((fields.get("id"), fields.get("data")) if "event" not in fields else fields["event"])
+    return parsed
+
+
+def test_stdout_router_is_installed_only_while_the_app_runs(monkeypatch):
+    original = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", original)
+
+    with TestClient(api.app):
+        assert sys.stdout is api.stdout_router
+        assert api.stdout_router.stream is original
+    assert sys.stdout is original
+
+
+class TestSendLogs:
+    @pytest.fixture
+    def client(self, monkeypatch):
+        def cmd_send(**kwargs):
+            # Straight to the router that print() reaches outside pytest's capture
+            print("one", file=api.stdout_router)
+            print("two", file=api.stdout_router)
+            print("tail", end="", file=api.stdout_router)
+
+        monkeypatch.setattr(api, "cmd_send", cmd_send)
+        monkeypatch.setattr(api, "JOBS", {})
+        with TestClient(api.app) as client:
+            yield client
+
+    def test_stream_replays_the_job_and_resumes_after_last_event_id(self, client):
+        job_id = client.post("/api/send", json={"confirm": True}).json()["job_id"]
+
+        response = client.get(f"/api/send/{job_id}/logs")
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert events(response.text) == [("1", "one"), ("2", "two"), ("3", "tail"), "done"]
+
+        # A finished job is kept, so a dropped stream can pick up where it left off
+        response = client.get(f"/api/send/{job_id}/logs", headers={"Last-Event-ID": "2"})
+        assert events(response.text) == [("3", "tail"), "done"]
+
+    def test_finished_job_expires(self, client, monkeypatch):
+        monkeypatch.setattr(api, "JOB_TTL", 0)
+        job_id = client.post("/api/send", json={"confirm": True}).json()["job_id"]
+        client.post("/api/send", json={})  # give the loop a turn to run the expiry
+
+        assert job_id not in api.JOBS
+        assert client.get(f"/api/send/{job_id}/logs").status_code == 404
+
+    def test_buffer_keeps_only_the_last_lines(self):
+        job = api.SendJob(maxlen=2)
+        job.write("a\nb\nc\n")
+        job.finish()
+
+        assert list(job.lines) == ["b", "c"]
+        assert job.total == 3
+
+
+class TestConditionalJson:
+    def test_folders_answer_304_for_a_matching_etag(self, monkeypatch):
+        db = MagicMock()
+        db.get_all_folders.return_value = [{"id": 1, "name": "Engineering", "list_count": 3}]
+        monkeypatch.setattr(api, "get_db", lambda: db)
+        client = TestClient(api.app)
+
+        response = client.get("/api/folders")
+        assert response.json() == [{"id": 1, "name": "Engineering", "list_count": 3}]
+        assert response.headers["cache-control"] == "no-cache"
+        etag = response.headers["etag"]
+
+        response = client.get("/api/folders", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+        # Changed data gets a new ETag and a full body
+        db.get_all_folders.return_value = []
+        response = client.get("/api/folders", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+
+class TestValidate:
+    @pytest.fixture
+    def checks(self, monkeypatch):
+        checks = MagicMock(return_value=True)
+        monkeypatch.setattr(api, "cmd_validate", checks)
+        monkeypatch.setattr(api, "_validate_cache", None)
+        return checks
+
+    def test_result_is_reused_until_forced_or_expired(self, checks, monkeypatch):
+        client = TestClient(api.app)
+
+        response = client.get("/api/validate")
+        assert response.json()["success"] is True
+        assert response.headers["cache-control"] == "no-cache"
+        client.get("/api/validate")
+        assert checks.call_count == 1
+
+        client.get("/api/validate", params={"force": "true"})
+        assert checks.call_count == 2
+
+        monkeypatch.setattr(api, "VALIDATE_TTL", 0)
+        client.get("/api/validate", params={"force": "true"})
+        client.get("/api/validate")
+        assert checks.call_count == 4
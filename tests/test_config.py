@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_stub_settings_keep_defaults_and_helpers(tmp_path):
+    # No .env and none of the required variables: importing under pytest falls back to the stub
+    env = {"PATH": os.environ.get("PATH", ""), "PYTEST_CURRENT_TEST": "stub", "PYTHONPATH": str(ROOT)}
+    code = (
+        "from src.config import settings\n"
+        "print(settings.BREVO_PAGE_WINDOW, settings.MAX_RETRIES, settings.TEMPLATE_NAME,\n"
+        "      settings.is_test_env, settings.api_base_url, settings.get_experience_list_map(),\n"
+        "      settings.validate_required_fields())\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, check=True)
+
+    assert result.stdout.split() == ["4", "2", "None", "True", "https://graph.facebook.com/v21.0", "{}", "[]"]
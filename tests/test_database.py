@@ -1,27 +1,29 @@
+import threading
+import time
+import orjson
 import pytest
 from unittest.mock import MagicMock, patch
-from src.database import BrevoClient, settings
+from src.database import BrevoClient, get_db, settings
 
 class TestBrevoClient:
     
-    @patch('src.database.requests.get')
+    @patch('src.database.requests.Session.get')
     def test_verify_connection_success(self, mock_get):
         mock_get.return_value.status_code = 200
         client = BrevoClient()
         assert client.verify_connection() is True
         mock_get.assert_called_with(
             "https://api.brevo.com/v3/account", 
-            headers=client.headers, 
             timeout=10
         )
 
-    @patch('src.database.requests.get')
+    @patch('src.database.requests.Session.get')
     def test_verify_connection_failure(self, mock_get):
         mock_get.return_value.status_code = 401
         client = BrevoClient()
         assert client.verify_connection() is False
 
-    @patch('src.database.requests.get')
+    @patch('src.database.requests.Session.get')
     def test_get_eligible_recipients(self, mock_get):
         client = BrevoClient()
         
@@ -49,7 +51,7 @@ class TestBrevoClient:
         }
         
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = mock_response
+        mock_get.return_value.content = orjson.dumps(mock_response)
         
         # We expect only ID 1 to be returned
         # ID 2 is opted out via custom attribute
@@ -61,16 +63,220 @@ class TestBrevoClient:
         assert users[0]['id'] == "1"
         assert users[0]['phone'] == "1234567890"
 
-    @patch('src.database.requests.get')
+    @patch('src.database.requests.Session.get')
     def test_get_eligible_recipients_with_list_id(self, mock_get):
         settings.BREVO_LIST_ID = 5
         client = BrevoClient()
         
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = {"contacts": []}
+        mock_get.return_value.content = orjson.dumps({"contacts": []})
         
         client.get_eligible_recipients()
         
         # Assert listId param was passed
         args, kwargs = mock_get.call_args
         assert kwargs['params']['listId'] == 5
+
+    @patch('src.database.requests.Session.get')
+    def test_get_eligible_recipients_paginates_in_windows(self, mock_get):
+        client = BrevoClient()
+        
+        def page(url, params=None, timeout=None):
+            offset = params['offset']
+            count = 100 if offset < 200 else 30
+            response = MagicMock()
+            response.content = orjson.dumps({
+                "contacts": [
+                    {"id": offset + i, "listIds": [7], "attributes": {"SMS": f"44{offset + i:010d}"}}
+                    for i in range(count)
+                ]
+            })
+            return response
+        
+        mock_get.side_effect = page
+        
+        users = client.get_eligible_recipients(limit=250, list_id=7, campaign_key="window-test")
+        
+        assert len(users) == 230
+        assert [u['id'] for u in users[:3]] == ["0", "1", "2"]
+        assert users[-1]['id'] == "229"
+        offsets = sorted(call.kwargs['params']['offset'] for call in mock_get.call_args_list)
+        assert offsets[:3] == [0, 100, 200]
+
+    @patch('src.database.requests.Session.get')
+    def test_iter_eligible_recipients_fetches_pages_on_demand(self, mock_get):
+        client = BrevoClient()
+        
+        def page(url, params=None, timeout=None):
+            offset = params['offset']
+            response = MagicMock()
+            response.content = orjson.dumps({
+                "contacts": [
+                    {"id": offset + i, "listIds": [7], "attributes": {"SMS": f"44{offset + i:010d}"}}
+                    for i in range(100)
+                ]
+            })
+            return response
+        
+        mock_get.side_effect = page
+        
+        users = client.iter_eligible_recipients(list_id=7, campaign_key="stream-test")
+        assert mock_get.call_count == 0  # Nothing fetched until consumed
+        
+        first = next(users)
+        assert first['id'] == "0"
+        assert mock_get.call_count == 1  # Only the first page so far
+        
+        users.close()
+
+    @patch('src.database.requests.Session.get')
+    def test_get_eligible_recipients_skips_already_sent(self, mock_get):
+        client = BrevoClient()
+        client.create_tables_if_dev()
+        client.record_send("441234567890", "camp-1", "success")
+        client.record_send("441234567891", "camp-1", "failed")
+        client.record_send("441234567892", "camp-2", "success")
+        
+        mock_get.return_value.content = orjson.dumps({
+            "contacts": [
+                {"id": i, "listIds": [7], "attributes": {"SMS": f"44123456789{i}"}}
+                for i in range(3)
+            ]
+        })
+        
+        users = client.get_eligible_recipients(list_id=7, campaign_key="camp-1")
+        
+        assert [u['id'] for u in users] == ["1", "2"]
+        assert client._load_sent_set("camp-1") == {"441234567890"}
+
+    @patch('src.database.requests.Session.get')
+    def test_incremental_sync_sends_modified_since_after_full_scan(self, mock_get, monkeypatch):
+        monkeypatch.setattr(settings, "BREVO_INCREMENTAL_SYNC", True)
+        client = BrevoClient()
+        client.create_tables_if_dev()
+        
+        mock_get.return_value.content = orjson.dumps({
+            "contacts": [
+                {"id": 1, "listIds": [7], "attributes": {"SMS": "441234567890"}, "modifiedAt": "2026-01-02T10:00:00.000Z"},
+                {"id": 2, "listIds": [7], "attributes": {"SMS": "441234567891"}, "modifiedAt": "2026-01-03T09:00:00.000Z"},
+            ]
+        })
+        
+        client.get_eligible_recipients(list_id=7, campaign_key="camp-1")
+        assert "modifiedSince" not in mock_get.call_args.kwargs['params']
+        
+        # The cursor waits until the caller confirms the scan's recipients were handled
+        client.get_eligible_recipients(list_id=7, campaign_key="camp-1")
+        assert "modifiedSince" not in mock_get.call_args.kwargs['params']
+        client.commit_scan_cursor(list_id=7, campaign_key="camp-1")
+        
+        client.get_eligible_recipients(list_id=7, campaign_key="camp-1")
+        assert mock_get.call_args.kwargs['params']['modifiedSince'] == "2026-01-03T09:00:00.000Z"
+        
+        # A different campaign still starts from a full scan
+        client.get_eligible_recipients(list_id=7, campaign_key="camp-2")
+        assert "modifiedSince" not in mock_get.call_args.kwargs['params']
+
+    @patch('src.database.requests.Session.get')
+    def test_get_all_folders_attaches_list_counts(self, mock_get):
+        client = BrevoClient()
+        
+        def respond(url, timeout=None):
+            response = MagicMock()
+            if "/lists" in url:
+                folder_id = int(url.split("/folders/")[1].split("/")[0])
+                response.json.return_value = {"count": folder_id * 10,
+                                              "lists": [{"id": folder_id * 100, "name": "Senior"}]}
+            else:
+                response.json.return_value = {"folders": [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}]}
+            return response
+        
+        mock_get.side_effect = respond
+        
+        folders = client.get_all_folders()
+        
+        assert [(f['id'], f['list_count']) for f in folders] == [(1, 10), (2, 20)]
+        
+        # Served from the cache until invalidated
+        calls = mock_get.call_count
+        assert client.get_all_folders() is folders
+        assert mock_get.call_count == calls
+        client.invalidate_folder_cache()
+        client.get_all_folders()
+        assert mock_get.call_count == 2 * calls
+        
+        # The folder lookup reuses the cached folder pages; only the lists are fetched
+        assert dict(client.get_lists_by_folder_name("b")) == {"Senior": 200}
+        assert mock_get.call_count == 2 * calls + 1
+
+    def test_stale_folder_cache_is_served_while_refreshing(self):
+        client = BrevoClient()
+        client.folder_cache_ttl = 0
+        loads = iter([("old",), ("new",)])
+        
+        assert client._cached(("k",), lambda: next(loads)) == ("old",)
+        # Past the TTL but not the stale TTL: the old value comes back immediately
+        assert client._cached(("k",), lambda: next(loads)) == ("old",)
+        
+        deadline = time.monotonic() + 2
+        while ("k",) in client._folder_refreshing and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert client._folder_cache[("k",)][2] == ("new",)
+
+    def test_buffered_sends_are_written_in_the_background(self):
+        client = BrevoClient()
+        client.create_tables_if_dev()
+        client.flush_every = 2
+        
+        client.buffer_send("441234567890", "camp-1", "success", wamid="wamid.1")
+        client.buffer_send("441234567891", "camp-1", "failed", error="boom")
+        client.buffer_send("441234567892", "camp-1", "success")
+        client.flush_sends()
+        
+        assert client._writer.name == "send-history-writer"
+        assert client._load_sent_set("camp-1") == {"441234567890", "441234567892"}
+        assert client.was_sent_before("441234567891", "camp-1") is False
+        
+        client.close()
+        assert client._writer is None
+
+    def test_campaign_history_scan_uses_success_index(self):
+        client = BrevoClient()
+        client.create_tables_if_dev()
+        
+        plan = client.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT phone FROM send_history "
+            "WHERE campaign_key = ? AND status = 'success'",
+            ("camp-1",)
+        ).fetchall()
+        
+        assert "INDEX idx_success" in " ".join(row[-1] for row in plan)
+
+    def test_history_reads_and_cursor_writes_can_overlap(self):
+        client = BrevoClient()
+        client.create_tables_if_dev()
+        phones = {f"4412345{i:05d}" for i in range(500)}
+        client.record_sends([(phone, "camp-1", None, None, "success", None, None) for phone in phones])
+        
+        # The prefetch thread loads the next list's history while the send loop
+        # commits a sync cursor; neither may see the other's result rows
+        loaded = []
+        reader = threading.Thread(target=lambda: loaded.extend(client._load_sent_set("camp-1") for _ in range(50)))
+        reader.start()
+        for i in range(200):
+            client.set_sync_cursor("contacts:camp-1:7", f"2026-01-01T00:00:{i % 60:02d}.000Z")
+            assert client.get_sync_cursor("contacts:camp-1:7") is not None
+        reader.join()
+        
+        assert all(sent == phones for sent in loaded)
+
+    def test_only_the_shared_client_is_closed_at_exit(self, monkeypatch):
+        registered = []
+        monkeypatch.setattr("src.database.atexit.register", registered.append)
+        
+        BrevoClient()
+        assert registered == []
+        
+        db = get_db.__wrapped__()
+        assert registered == [db.close]
+        db.close()
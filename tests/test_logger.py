@@ -0,0 +1,49 @@
+import orjson
+from datetime import datetime
+from src.logger import ResultLogger
+
+
+class TestResultLogger:
+    def test_daily_summary_counts_only_todays_records(self, tmp_path):
+        result_logger = ResultLogger()
+        result_logger.file_path = tmp_path / "result.jsonl"
+    
+        # Plenty of older history in the pre-segmentation file, so the summary has to seek past it
+        with open(result_logger.file_path, "wb") as f:
+            for i in range(5000):
+                f.write(orjson.dumps({"timestamp": f"2020-01-{i % 28 + 1:02d}T10:00:00", "status": "success"}) + b"\n")
+    
+        result_logger.log_result("1", "441234567890", "success", wa_message_id="wamid.1", http_code=200)
+        result_logger.log_result("2", "441234567891", "failed", error="boom", http_code=400)
+        result_logger.log_result("3", "441234567892", "skipped", error="Invalid phone")
+    
+        summary = result_logger.generate_daily_summary()
+    
+        assert summary["date"] == datetime.now().date().isoformat()
+        assert (summary["total_selected"], summary["sent"], summary["failed"], summary["skipped"]) == (3, 1, 1, 1)
+        assert summary["error_codes"] == {"400": 1}
+        assert summary["skip_reasons"] == {"Invalid phone": 1}
+
+    def test_daily_summary_resumes_from_saved_offset(self, tmp_path):
+        result_logger = ResultLogger()
+        result_logger.file_path = tmp_path / "result.jsonl"
+        
+        today = datetime.now().date().isoformat()
+        
+        result_logger.log_result("1", "441234567890", "success")
+        assert result_logger.generate_daily_summary()["sent"] == 1
+        assert result_logger.segment_path(today) == tmp_path / f"result.{today}.jsonl"
+        assert (tmp_path / f"result.{today}.jsonl.offset").exists()
+        
+        result_logger.log_result("2", "441234567891", "failed", error="boom", http_code=500)
+        summary = result_logger.generate_daily_summary()
+        
+        assert (summary["total_selected"], summary["sent"], summary["failed"]) == (2, 1, 1)
+        assert summary["error_codes"] == {"500": 1}
+        
+        # A rewritten (different) file is summarised from scratch
+        result_logger.close()
+        result_logger.segment_path(today).unlink()
+        result_logger.log_result("3", "441234567892", "skipped", error="Invalid phone")
+        summary = result_logger.generate_daily_summary()
+        assert (summary["total_selected"], summary["skipped"]) == (1, 1)
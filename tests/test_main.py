@@ -0,0 +1,241 @@
+import threading
+import time
+import pytest
+import requests
+from unittest.mock import MagicMock
+import src.main as main
+from src.config import settings
+from src.rate_limiter import Breaker, RateLimiter
+
+
+def recipients(count):
+    return [{"id": str(i), "phone": f"4412345678{i:02d}", "experience_level": None, "list_id": None}
+            for i in range(count)]
+
+
+def delivered(to_phone, **kwargs):
+    return {"messages": [{"id": "wamid." + to_phone}]}, 200
+
+
+def history(db, status):
+    """Phones recorded in send_history with status, in order."""
+    return [call.args[0] for call in db.buffer_send.call_args_list if call.args[2] == status]
+
+
+class TestCmdSend:
+    @pytest.fixture
+    def db(self, monkeypatch):
+        db = MagicMock()
+        monkeypatch.setattr(main, "get_db", lambda: db)
+        return db
+
+    @pytest.fixture
+    def run_send(self, db, monkeypatch):
+        """Run cmd_send against a stubbed recipient scan and WhatsApp send."""
+        monkeypatch.setattr(settings, "SEND_DELAY_SECONDS", 0)
+        monkeypatch.setattr(settings, "RETRY_BACKOFF_SECONDS", 0.01)
+        monkeypatch.setattr(settings, "DAILY_LIMIT", 100)
+        monkeypatch.setattr(main, "cmd_validate", lambda: True)
+        monkeypatch.setattr(main.result_logger, "log_result", MagicMock())
+        monkeypatch.setattr(main.result_logger, "log_daily_summary", MagicMock())
+
+        def run(users, send=None, limit=None, concurrency=1, limiter=None):
+            """send stubs send_template_message; None keeps the real client (stub its session)."""
+            monkeypatch.setattr(settings, "SEND_CONCURRENCY", concurrency)
+            monkeypatch.setattr(main, "limiter", limiter or RateLimiter())
+            if send is not None:
+                monkeypatch.setattr(main.wa_client, "send_template_message", send)
+            db.iter_eligible_recipients.side_effect = lambda **kwargs: (user for user in users)
+            main.cmd_send(limit=limit, campaign_id="camp")
+
+        return run
+
+    def test_interrupted_run_records_sends_still_in_flight(self, run_send, db):
+        def send(to_phone, **kwargs):
+            time.sleep(0.1)
+            return {"messages": [{"id": "wamid." + to_phone}]}, 200
+
+        limiter = RateLimiter()
+        # Interrupted while dispatching the second recipient, with the first in flight
+        limiter.wait_for_slot = MagicMock(side_effect=[None, KeyboardInterrupt])
+
+        with pytest.raises(KeyboardInterrupt):
+            run_send(recipients(3), send, concurrency=2, limiter=limiter)
+
+        # The first message went out, so the next run must not send it again
+        assert history(db, "success") == ["441234567800"]
+        db.flush_sends.assert_called()
+
+    def test_sends_overlap_up_to_the_concurrency_window(self, run_send, db):
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def send(to_phone, **kwargs):
+            with lock:
+                active.append(to_phone)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(to_phone)
+            return delivered(to_phone)
+
+        run_send(recipients(6), send, concurrency=3)
+
+        assert max(peak) == 3
+        assert len(history(db, "success")) == 6
+
+    def test_retryable_failure_is_rescheduled_within_the_run(self, run_send, db):
+        calls = []
+
+        def send(to_phone, **kwargs):
+            calls.append(to_phone)
+            if calls.count(to_phone) == 1 and to_phone.endswith("01"):
+                raise requests.ConnectionError("connection reset")
+            return delivered(to_phone)
+
+        run_send(recipients(3), send)
+
+        assert calls.count("441234567801") == 2
+        assert sorted(history(db, "success")) == ["441234567800", "441234567801", "441234567802"]
+        assert history(db, "failed") == []
+
+    def test_retry_waits_use_decorrelated_jitter(self, run_send, db, monkeypatch):
+        waits = []
+
+        def uniform(low, high):
+            waits.append((low, high))
+            return high
+
+        monkeypatch.setattr(main.random, "uniform", uniform)
+        send = MagicMock(side_effect=[requests.ConnectionError("connection reset")] * 2 + [delivered("441234567800")])
+
+        run_send(recipients(1), send)
+
+        # Each wait is drawn between the base and 3x that recipient's previous wait
+        base = settings.RETRY_BACKOFF_SECONDS
+        assert waits == [(base, 3 * base), (base, 9 * base)]
+        assert history(db, "success") == ["441234567800"]
+
+    def test_retry_after_takes_priority_over_jitter(self, run_send, db, monkeypatch):
+        uniform = MagicMock()
+        monkeypatch.setattr(main.random, "uniform", uniform)
+        response = MagicMock(status_code=429, headers={"Retry-After": "0.2"})
+        send = MagicMock(side_effect=[requests.HTTPError("429 Too Many Requests", response=response),
+                                      delivered("441234567800")])
+
+        started = time.monotonic()
+        run_send(recipients(1), send)
+
+        assert time.monotonic() - started >= 0.2
+        assert not uniform.called
+        assert history(db, "success") == ["441234567800"]
+
+    def test_each_attempt_is_a_single_post(self, run_send, db, monkeypatch):
+        response = MagicMock(status_code=500, headers={})
+        response.raise_for_status.side_effect = requests.HTTPError("500 Server Error", response=response)
+        post = MagicMock(return_value=response)
+        monkeypatch.setattr(main.wa_client.session, "post", post)
+        limiter = RateLimiter()
+        limiter.max_consecutive_failures = 100  # keep the breaker out of this test
+
+        run_send(recipients(4), limiter=limiter)
+
+        # The client does not retry on top of cmd_send's rescheduling
+        assert post.call_count == 4 * (settings.MAX_RETRIES + 1)
+        assert len(history(db, "failed")) == 4
+
+    def test_run_and_daily_limits_stop_dispatching(self, run_send, db):
+        send = MagicMock(side_effect=delivered)
+        run_send(recipients(5), send, limit=3)
+        assert send.call_count == 3
+
+        db.reset_mock()
+        limiter = RateLimiter()
+        limiter.daily_limit = 2
+        send = MagicMock(side_effect=delivered)
+        run_send(recipients(5), send, concurrency=2, limiter=limiter)
+        assert send.call_count == 2
+        assert len(history(db, "success")) == 2
+
+    @pytest.fixture
+    def fast_breaker(self, monkeypatch):
+        breakers = []
+
+        def make():
+            breakers.append(Breaker(base_backoff=0.01, max_backoff=0.04))
+            return breakers[-1]
+
+        monkeypatch.setattr(main, "Breaker", make)
+        return breakers
+
+    def test_breaker_pauses_then_recovers(self, run_send, db, fast_breaker):
+        calls = []
+
+        def send(to_phone, **kwargs):
+            calls.append(to_phone)
+            if len(calls) <= 3:
+                raise requests.ConnectionError("connection reset")
+            return delivered(to_phone)
+
+        run_send(recipients(5), send)
+
+        assert sorted(history(db, "success")) == [f"4412345678{i:02d}" for i in range(5)]
+        assert fast_breaker[0].state == 'closed'
+
+    def test_dead_upstream_ends_the_run(self, run_send, db, fast_breaker, monkeypatch):
+        monkeypatch.setattr(type(settings), "get_experience_list_map", lambda self: {"junior": 1, "senior": 2})
+        send = MagicMock(side_effect=requests.ConnectionError("connection refused"))
+
+        run_send(recipients(10), send)
+
+        # Three failures trip the breaker, then a probe per window (0.01, 0.02, 0.04s) before giving up
+        assert send.call_count == 3 + 3
+        assert db.iter_eligible_recipients.call_count == 1  # the next list is never scanned
+        # Retries still pending are recorded, not cycled
+        assert len(history(db, "failed")) == len(set(call.kwargs["to_phone"] for call in send.call_args_list))
+        assert not db.commit_scan_cursor.called
+
+
+class TestShouldRetryError:
+    @pytest.mark.parametrize("code", [400, 401, 403, 404, 422])
+    def test_client_errors_are_final(self, code):
+        # Even with a message that would otherwise look transient
+        assert main.should_retry_error(Exception("connection reset"), code) is False
+
+    @pytest.mark.parametrize("code", [429, 500, 502, 503, 504])
+    def test_rate_limits_and_server_errors_are_retried(self, code):
+        assert main.should_retry_error(Exception("template not found"), code) is True
+
+    @pytest.mark.parametrize("message, retryable", [
+        ("Read TIMEOUT after 30s", True),
+        ("Connection aborted", True),
+        ("Service temporarily unavailable", True),
+        ("Template not found: welcome", False),
+        ("Forbidden: policy violation and timeout", False),  # final patterns win
+        ("something odd happened", False),
+    ])
+    def test_message_patterns_without_a_status(self, message, retryable):
+        assert main.should_retry_error(Exception(message)) is retryable
+
+
+class TestRetryQueue:
+    def test_retries_come_back_soonest_first_once_due(self, monkeypatch):
+        monkeypatch.setattr(settings, "RETRY_BACKOFF_SECONDS", 0.01)
+        retries = main._RetryQueue()
+        user = recipients(1)[0]
+        slow, fast = (main._Attempt(user, phone, None, None, "camp") for phone in ("441", "442"))
+        response = MagicMock(headers={"Retry-After": "30"})
+
+        retries.schedule(slow, requests.HTTPError("429", response=response), 429)
+        retries.schedule(fast, requests.ConnectionError("connection reset"), None)
+        assert (slow.attempt, fast.attempt) == (1, 1)
+        assert retries.pop_due() is None
+
+        time.sleep(0.05)
+        assert retries.pop_due() is fast
+        assert retries.pop_due() is None  # the other waits for its Retry-After
+        assert 0 < retries.wait_time() <= 30
+
+        assert [entry[0] for entry in retries.drain()] == [slow]
+        assert len(retries) == 0 and retries.wait_time() is None
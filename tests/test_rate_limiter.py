@@ -1,7 +1,8 @@
+import threading
 import time
 import pytest
 from unittest.mock import MagicMock, patch
-from src.rate_limiter import RateLimiter
+from src.rate_limiter import Breaker, RateLimiter
 from src.config import settings
 
 class TestRateLimiter:
@@ -30,14 +31,108 @@ class TestRateLimiter:
         assert limiter.can_send("u2") is True
 
     @patch('time.sleep')
-    @patch('time.time')
+    @patch('time.monotonic')
     def test_wait_for_slot(self, mock_time, mock_sleep, limiter):
-        # Initial state
+        # Initial state: half a token left, no time elapsed
         mock_time.return_value = 100.0
-        limiter.last_send_time = 99.95 # 0.05s ago
-        settings.SEND_DELAY_SECONDS = 0.1
+        limiter.tokens = 0.5
+        limiter.last_refill = 100.0
         
         limiter.wait_for_slot()
         
-        # Should sleep for difference (0.1 - 0.05 = 0.05)
+        # Should sleep until the token refills ((1 - 0.5) * 0.1 = 0.05)
         mock_sleep.assert_called_with(pytest.approx(0.05))
+
+    @patch('time.sleep')
+    @patch('time.monotonic')
+    def test_wait_for_slot_allows_burst_after_idle(self, mock_time, mock_sleep, limiter):
+        limiter.capacity = 3
+        limiter.tokens = 0.0
+        limiter.last_refill = 100.0
+        mock_time.return_value = 110.0  # idle long enough to fill the bucket
+        
+        for _ in range(3):
+            limiter.wait_for_slot()
+        mock_sleep.assert_not_called()
+        
+        limiter.wait_for_slot()
+        mock_sleep.assert_called_once_with(pytest.approx(0.1))
+
+
+    @patch('time.sleep')
+    @patch('time.monotonic')
+    def test_concurrent_callers_queue_behind_reservations(self, mock_time, mock_sleep, limiter):
+        mock_time.return_value = 100.0
+        limiter.tokens = 1.0
+        limiter.last_refill = 100.0
+        
+        threads = [threading.Thread(target=limiter.wait_for_slot) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        # One token on hand, then each caller waits one more interval than the last
+        waits = sorted(call.args[0] for call in mock_sleep.call_args_list)
+        assert waits == [pytest.approx(0.1), pytest.approx(0.2), pytest.approx(0.3)]
+
+
+    def test_rate_limited_slows_down_then_recovers(self, limiter):
+        assert limiter.rate == pytest.approx(10.0)  # SEND_DELAY_SECONDS = 0.1
+        
+        limiter.record_rate_limited()
+        assert limiter.rate == pytest.approx(8.0)
+        
+        for i in range(20):
+            limiter.record_success(f"u{i}")
+        assert limiter.rate == pytest.approx(8.4)
+        
+        # Never faster than configured
+        limiter.rate = 9.9
+        for i in range(20):
+            limiter.record_success(f"v{i}")
+        assert limiter.rate == pytest.approx(10.0)
+
+
+class TestBreaker:
+    @patch('time.monotonic')
+    def test_probe_failures_widen_window_until_cap(self, mock_time):
+        mock_time.return_value = 100.0
+        breaker = Breaker(base_backoff=0.5, max_backoff=2.0)
+        
+        breaker.open()
+        assert breaker.remaining() == pytest.approx(0.5)
+        mock_time.return_value = 100.5
+        assert breaker.remaining() == 0
+        
+        breaker.half_open()
+        assert breaker.record_failure() is True
+        assert breaker.state == 'open'
+        assert breaker.backoff == 1.0
+        assert breaker.remaining() == pytest.approx(1.0)
+        
+        assert breaker.record_failure() is True
+        assert breaker.backoff == 2.0
+        assert breaker.record_failure() is False  # Already at the cap: give up
+        
+    def test_success_closes_and_resets(self):
+        breaker = Breaker(base_backoff=0.5)
+        breaker.open()
+        breaker.record_failure()
+        breaker.record_success()
+        assert breaker.state == 'closed'
+        assert breaker.backoff == 0.5
+
+    @patch('time.monotonic', return_value=100.0)
+    def test_default_window_doubles_to_a_minute_before_giving_up(self, mock_time):
+        breaker = Breaker()
+        breaker.open()
+        
+        windows = [breaker.backoff]
+        while True:
+            breaker.half_open()
+            if not breaker.record_failure():
+                break
+            windows.append(breaker.backoff)
+        
+        assert windows == [0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0]
@@ -0,0 +1,35 @@
+import orjson
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
+from src.whatsapp_client import WhatsAppClient
+
+
+def error_response(status_code):
+    response = MagicMock(status_code=status_code, headers={}, text="{}")
+    response.raise_for_status.side_effect = requests.HTTPError(f"{status_code} Error", response=response)
+    return response
+
+
+class TestSendTemplateMessage:
+    @patch('src.whatsapp_client.requests.Session.post')
+    def test_success_returns_body_and_status(self, mock_post):
+        mock_post.return_value = MagicMock(status_code=200, content=orjson.dumps({"messages": [{"id": "wamid.1"}]}))
+        client = WhatsAppClient()
+
+        response, status = client.send_template_message("441234567890", body_variables={"company": "Acme"})
+
+        assert (response["messages"][0]["id"], status) == ("wamid.1", 200)
+        payload = orjson.loads(mock_post.call_args.kwargs['data'])
+        assert payload["to"] == "441234567890"
+
+    @pytest.mark.parametrize("status_code", [400, 429, 503])
+    @patch('src.whatsapp_client.requests.Session.post')
+    def test_failure_raises_after_one_post(self, mock_post, status_code):
+        # Retrying is left to cmd_send, whatever the status
+        mock_post.return_value = error_response(status_code)
+        client = WhatsAppClient()
+
+        with pytest.raises(requests.HTTPError):
+            client.send_template_message("441234567890")
+        assert mock_post.call_count == 1
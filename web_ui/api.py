@@ -1,23 +1,67 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, StreamingResponse, Response
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 import os
 import sys
 import io
-import contextlib
+import asyncio
+import functools
+import itertools
+import threading
+import sqlite3
+import hashlib
+import time
+import orjson
 import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from uuid import uuid4
 
-# Add parent directory to sys.path to import src
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
+# Run from the repository root (python -m web_ui.api), so src imports as a package
 from src.main import cmd_validate, cmd_dry_run, cmd_send
-from src.database import db
+from src.database import get_db
 from src.config import settings
 from src.logger import result_logger
 
-app = FastAPI(title="WhatsApp Recruitment Dashboard")
+class ThreadStdout(io.TextIOBase):
+    """sys.stdout stand-in that sends each thread's prints to that thread's capture buffer.
+
+    redirect_stdout swaps the process-wide sys.stdout, so two commands running at
+    once would write into each other's logs; this routes by thread instead.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+    
+    def write(self, s):
+        buf = getattr(self.local, "buf", None)
+        return (buf if buf is not None else self.stream).write(s)
+    
+    def flush(self):
+        buf = getattr(self.local, "buf", None)
+        (buf if buf is not None else self.stream).flush()
+
+stdout_router = ThreadStdout(sys.stdout)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Route prints through stdout_router while the app runs (not merely once imported)."""
+    stdout_router.stream = sys.stdout
+    sys.stdout = stdout_router
+    try:
+        yield
+    finally:
+        # Unless someone else has replaced it since
+        if sys.stdout is stdout_router:
+            sys.stdout = stdout_router.stream
+
+app = FastAPI(title="WhatsApp Recruitment Dashboard", lifespan=lifespan)
+# Log text and JSON compress well; Starlette leaves text/event-stream (the live
+# send log) uncompressed so each event is flushed as it happens
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
 
 # Models
 class CampaignRequest(BaseModel):
@@ -31,56 +75,97 @@ class CampaignRequest(BaseModel):
     limit: Optional[int] = None
     confirm: bool = False
 
-# Global state to capture logs for the UI
-class LogCapture:
-    def __init__(self):
-        self.output = io.StringIO()
+def _printing_to(sink, fn, *args, **kwargs):
+    """Run fn in the current thread with its prints going to sink."""
+    stdout_router.local.buf = sink
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        stdout_router.local.buf = None
+
+class LineBuffer(io.TextIOBase):
+    """Print sink keeping only the last maxlen lines, so a long run's output stays bounded."""
+    def __init__(self, maxlen: int = 10000):
+        self.lines = deque(maxlen=maxlen)
+        self.pending = ""
+    
+    def write(self, s):
+        *lines, self.pending = (self.pending + s).split("\n")
+        self.lines.extend(lines)
+        return len(s)
     
-    def get_output(self):
-        val = self.output.getvalue()
-        # self.output.truncate(0)
-        # self.output.seek(0)
-        return val
+    def getvalue(self) -> str:
+        text = "\n".join(self.lines)
+        if self.lines:
+            text += "\n"
+        return text + self.pending
 
-log_capture = LogCapture()
+def _captured(fn, *args, **kwargs):
+    """Run fn in the current thread, returning (result, the last lines it printed).
 
-@app.get("/api/folders")
-def get_folders():
-    folders = db.get_all_folders()
-    return [{"id": f["id"], "name": f["name"], "list_count": f.get("list_count")} for f in folders]
+    Prints reach buf through stdout_router, so they are only captured while the
+    app is running (see lifespan); a bare import leaves sys.stdout alone.
+    """
+    buf = LineBuffer()
+    return _printing_to(buf, fn, *args, **kwargs), buf.getvalue()
 
-@app.get("/api/folder-levels")
-def get_folder_levels(folder: str):
-    mapping = db.get_lists_by_folder_name(folder)
-    return list(mapping.keys())
+async def run_command(fn, *args, **kwargs):
+    """Run a blocking CLI command on the default executor, keeping the event loop free."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(_captured, fn, *args, **kwargs))
 
-@app.get("/api/validate")
-def validate():
-    f = io.StringIO()
-    with contextlib.redirect_stdout(f):
-        success = cmd_validate()
-    return {"success": success, "logs": f.getvalue()}
+class SendJob(LineBuffer):
+    """A send job's output: its last maxlen lines, which any number of streams can
+    read (and re-read after reconnecting) while the job runs and for a while after.
 
-@app.post("/api/dry-run")
-def dry_run(req: CampaignRequest):
-    f = io.StringIO()
-    with contextlib.redirect_stdout(f):
-        cmd_dry_run(
-            limit=req.limit,
-            experience=req.experience,
-            campaign_id=req.campaign_id,
-            category=req.category
-        )
-    return {"logs": f.getvalue()}
+    Only touched on the event loop; line n (counting from 1) is sent as event id n.
+    """
+    def __init__(self, maxlen: int = 10000):
+        super().__init__(maxlen)
+        self.total = 0  # lines written so far, including any the buffer has dropped
+        self.done = False
+        self.changed = asyncio.Event()
+    
+    def write(self, s):
+        super().write(s)
+        self.total += s.count("\n")
+        self._notify()
+        return len(s)
+    
+    def finish(self):
+        if self.pending:
+            self.write("\n")
+        self.done = True
+        self._notify()
+    
+    def _notify(self):
+        # Wake every waiting stream; later waits use a fresh event
+        self.changed.set()
+        self.changed = asyncio.Event()
 
-@app.post("/api/send")
-def send(req: CampaignRequest):
-    if not req.confirm:
-        return {"error": "Confirmation required for live send", "logs": ""}
+class LoopWriter(io.TextIOBase):
+    """Print sink for a worker thread that hands each write to sink on the event loop."""
+    def __init__(self, loop, sink):
+        self.loop = loop
+        self.sink = sink
     
-    f = io.StringIO()
-    with contextlib.redirect_stdout(f):
-        cmd_send(
+    def write(self, s):
+        if s:
+            self.loop.call_soon_threadsafe(self.sink.write, s)
+        return len(s)
+
+# Send jobs by id, kept for JOB_TTL seconds after they finish so a stream that
+# drops near the end can reconnect and still read the tail
+JOBS: Dict[str, SendJob] = {}
+JOB_TTL = 300
+
+async def _run_campaign(job_id: str, req: "CampaignRequest"):
+    job = JOBS[job_id]
+    loop = asyncio.get_running_loop()
+    sink = LoopWriter(loop, job)
+    try:
+        await loop.run_in_executor(None, functools.partial(
+            _printing_to, sink, cmd_send,
             limit=req.limit,
             confirm=req.confirm,
             experience=req.experience,
@@ -90,23 +175,154 @@ def send(req: CampaignRequest):
             company=req.company,
             location=req.location,
             apply_link=req.apply_link
-        )
-    return {"logs": f.getvalue()}
+        ))
+    except Exception as e:
+        job.write(f"\n❌ Campaign failed: {e}\n")
+    finally:
+        # Runs after the worker's last call_soon_threadsafe, so no output is cut off
+        job.finish()
+        loop.call_later(JOB_TTL, JOBS.pop, job_id, None)
+
+def _conditional_json(request: Request, data) -> Response:
+    """JSON response with an ETag; answers 304 with no body when the client already has it."""
+    body = orjson.dumps(data)
+    etag = '"' + hashlib.md5(body, usedforsecurity=False).hexdigest() + '"'
+    # Revalidated on every use, so a folder edited in Brevo shows up on the next load
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/api/folders")
+def get_folders(request: Request):
+    folders = get_db().get_all_folders()
+    return _conditional_json(request, [{"id": f["id"], "name": f["name"], "list_count": f.get("list_count")} for f in folders])
+
+@app.get("/api/folder-levels")
+def get_folder_levels(request: Request, folder: str):
+    mapping = get_db().get_lists_by_folder_name(folder)
+    return _conditional_json(request, list(mapping.keys()))
+
+@app.post("/api/cache/invalidate")
+def invalidate_cache():
+    # Folder and list lookups are cached by the Brevo client; drop them after editing folders in Brevo
+    get_db().invalidate_folder_cache()
+    return {"invalidated": True}
+
+# The full check (config, Brevo and WhatsApp round trips) is reused for this many
+# seconds, so repeated clicks and page loads don't redo it; ?force=true reruns it
+VALIDATE_TTL = 30
+_validate_cache: Optional[tuple] = None  # (expires_at, success, logs)
+
+@app.get("/api/validate")
+async def validate(response: Response, force: bool = False):
+    global _validate_cache
+    cached = _validate_cache
+    if force or cached is None or cached[0] <= time.monotonic():
+        success, logs = await run_command(cmd_validate)
+        cached = _validate_cache = (time.monotonic() + VALIDATE_TTL, success, logs)
+    # The reuse happens here; a browser copy would outlive ?force=true and a fix in .env
+    response.headers["Cache-Control"] = "no-cache"
+    return {"success": cached[1], "logs": cached[2]}
+
+@app.post("/api/dry-run")
+async def dry_run(req: CampaignRequest):
+    _, logs = await run_command(
+        cmd_dry_run,
+        limit=req.limit,
+        experience=req.experience,
+        campaign_id=req.campaign_id,
+        category=req.category
+    )
+    return {"logs": logs}
+
+@app.post("/api/send")
+async def send(req: CampaignRequest, background_tasks: BackgroundTasks):
+    if not req.confirm:
+        return {"error": "Confirmation required for live send", "logs": ""}
+    
+    # Returns straight away; the campaign's output is read from /api/send/{job_id}/logs
+    job_id = uuid4().hex
+    JOBS[job_id] = SendJob()
+    background_tasks.add_task(_run_campaign, job_id, req)
+    return {"job_id": job_id}
+
+@app.get("/api/send/{job_id}/logs")
+async def send_logs(job_id: str, request: Request):
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    
+    # A reconnecting EventSource sends the id of the last line it received
+    try:
+        seen = int(request.headers.get("last-event-id", 0))
+    except ValueError:
+        seen = 0
+    
+    async def events():
+        nonlocal seen
+        while True:
+            changed = job.changed
+            # Lines that already dropped out of the buffer are skipped. Copied before
+            # yielding, since the job keeps writing while the client reads.
+            first = job.total - len(job.lines)
+            seen = max(seen, first)
+            # One event per complete line; the id lets a reconnect resume after it
+            for line in list(itertools.islice(job.lines, seen - first, None)):
+                seen += 1
+                yield f"id: {seen}\ndata: {line}\n\n"
+            if job.done:
+                break
+            await changed.wait()
+        yield "event: done\ndata: \n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+# Every dashboard window in one range scan: rows are bucketed by their newest
+# window and the totals accumulated in Python
+_SUMMARY_WINDOWS = ("1h", "24h", "7d")
+_SUMMARY_SQL = (
+    "SELECT status, "
+    "CASE WHEN sent_at >= datetime('now', '-1 hour') THEN '1h' "
+    "WHEN sent_at >= datetime('now', '-1 day') THEN '24h' "
+    "ELSE '7d' END AS bucket, count(*) "
+    "FROM send_history WHERE sent_at >= datetime('now', '-7 days') "
+    "GROUP BY status, bucket"
+)
+
+# One read connection for the dashboard's polling, opened on first use. In WAL
+# mode it reads alongside a running campaign's writes without waiting on them.
+_summary_conn: Optional[sqlite3.Connection] = None
+_summary_lock = threading.Lock()
+
+def _summary_rows():
+    global _summary_conn
+    with _summary_lock:
+        if _summary_conn is None:
+            conn = sqlite3.connect("send_history.db", check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA query_only=ON")
+            _summary_conn = conn
+        return _summary_conn.execute(_SUMMARY_SQL).fetchall()
 
 @app.get("/api/summary")
 def summary():
-    # This might be tricky if it only prints. Let's assume we want the last 24h stats.
-    import sqlite3
-    conn = sqlite3.connect("send_history.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT status, count(*) FROM send_history WHERE sent_at >= datetime('now', '-1 day') GROUP BY status")
-    stats = dict(cursor.fetchall())
-    conn.close()
+    windows = {w: {"success": 0, "failed": 0, "total": 0} for w in _SUMMARY_WINDOWS}
+    for status, bucket, count in _summary_rows():
+        # A send in the last hour also counts towards the last day and week
+        for w in _SUMMARY_WINDOWS[_SUMMARY_WINDOWS.index(bucket):]:
+            stats = windows[w]
+            if status in stats:
+                stats[status] += count
+            stats["total"] += count
+    day = windows["24h"]
     return {
-        "success": stats.get("success", 0),
-        "failed": stats.get("failed", 0),
-        "total": sum(stats.values()),
-        "limit": settings.DAILY_LIMIT
+        "success": day["success"],
+        "failed": day["failed"],
+        "total": day["total"],
+        "limit": settings.DAILY_LIMIT,
+        "windows": windows
     }
 
 # Serve static files
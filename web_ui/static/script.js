@@ -113,6 +113,11 @@ async function confirmAndSend() {
     sendBtn.disabled = true;
     sendBtn.textContent = 'Sending...';
 
+    const finish = () => {
+        sendBtn.disabled = false;
+        sendBtn.textContent = 'Send Messages';
+    };
+
     try {
         const response = await fetch('/api/send', {
             method: 'POST',
@@ -120,13 +125,29 @@ async function confirmAndSend() {
             body: JSON.stringify(params)
         });
         const data = await response.json();
-        log(data.logs);
-        updateStats();
+        if (!data.job_id) {
+            log(data.error || data.logs);
+            finish();
+            return;
+        }
+
+        // Follow the campaign's output live while it runs
+        const stream = new EventSource(`/api/send/${data.job_id}/logs`);
+        stream.onmessage = (event) => log(event.data);
+        stream.addEventListener('done', () => {
+            stream.close();
+            updateStats();
+            finish();
+        });
+        stream.onerror = () => {
+            // The browser reconnects on its own, resuming after the last line received
+            if (stream.readyState !== EventSource.CLOSED) return;
+            log("Log stream closed");
+            finish();
+        };
     } catch (error) {
         log("Error: " + error);
-    } finally {
-        sendBtn.disabled = false;
-        sendBtn.textContent = 'Send Messages';
+        finish();
     }
 }
 